@@ -0,0 +1,137 @@
+import json
+import asyncio
+import logging
+from src.settings import config
+from src.llm import run_batch
+from src.events import bus, IDLE_RECHECK_SECONDS
+from src.prompt_payload import build_job_payload
+from src import degree_cache
+from src.writer import (
+    load_user_data, claim_next_writing_job, release_writing_job, fail_writing_job, load_job_company,
+    degree_judge_request, parse_degree_judgment, save_degree_decision,
+    resume_request, split_resume_feedback, cover_letter_request, finish_written_job
+)
+
+# Bulk writer mode: instead of one chat call per step per job, every scraped job is
+# written through the OpenAI Batch API (about half the price, results within 24h).
+# Two batches per run, since the resume and cover letter need the degree decision:
+#   1. degree judge for jobs that do not have one yet
+#   2. resume + cover letter for every job
+# Results go through the same PDF / processed-table flow as the regular writer.
+# A run interrupted by a restart is resubmitted; its claimed rows return to 'scraped' once their lease expires.
+# A job with a failed or missing result counts a failed write (writer.fail_writing_job), so one that keeps
+# failing leaves the queue after MAX_WRITE_ATTEMPTS batches instead of being resubmitted in every one.
+
+async def run_bulk_writing():
+    """Claim every scraped job, write them all through the Batch API and return the ids written."""
+    user_data = load_user_data()
+    if not user_data:
+        return []
+
+    rows = []
+    while True:
+        row = claim_next_writing_job()
+        if not row:
+            break
+        rows.append(row)
+    if not rows:
+        return []
+
+    print(f"Bulk writing {len(rows)} jobs through the OpenAI Batch API...")
+    poll_seconds = int(config("BATCH_POLL_SECONDS"))
+    jobs = {}
+    for job_id, job_url, job_data_json, degree, degree_reason, job_title in rows:
+        job_data = json.loads(job_data_json)
+        jobs[job_id] = {
+            "url": job_url,
+            "job_data": job_data,
+            "job_json": build_job_payload(job_data, config("WRITER_MODEL")),
+            "degree": degree,
+            "degree_reason": degree_reason,
+            "job_title": job_title,
+            "job_company": load_job_company(job_id) or "Unknown"
+        }
+
+    written = []
+    try:
+        # 1) Degree judge for jobs without a decision (cached decisions are reused directly)
+        for job_id, job in jobs.items():
+            judgment = None if job["degree"] else degree_cache.lookup(job["job_data"], user_data)
+            if judgment:
+                approach, explanation, job_title, job_company = judgment
+                save_degree_decision(job_id, approach, explanation, job_title, job_company)
+                job.update(degree=approach, degree_reason=explanation, job_title=job_title, job_company=job_company)
+
+        judge_requests = {
+            f"judge-{job_id}": degree_judge_request(job["job_json"], user_data)
+            for job_id, job in jobs.items() if not job["degree"]
+        }
+        if judge_requests:
+            answers = await run_batch(judge_requests, poll_seconds)
+            for job_id in [job_id for job_id, job in jobs.items() if not job["degree"]]:
+                raw = answers.get(f"judge-{job_id}")
+                if raw is None:
+                    print(f"Degree judge failed for job id={job_id}, returning it to the queue.")
+                    fail_writing_job(job_id, "No degree judge result in the batch")
+                    del jobs[job_id]
+                    continue
+                judgment = parse_degree_judgment(raw)
+                degree_cache.store(jobs[job_id]["job_data"], user_data, judgment)
+                approach, explanation, job_title, job_company = judgment
+                save_degree_decision(job_id, approach, explanation, job_title, job_company)
+                jobs[job_id].update(degree=approach, degree_reason=explanation, job_title=job_title, job_company=job_company)
+
+        if not jobs:
+            return written
+
+        # 2) Resume & cover letter for every job
+        writing_requests = {}
+        for job_id, job in jobs.items():
+            writing_requests[f"resume-{job_id}"] = resume_request(user_data, job["job_json"], job["degree"], job["degree_reason"])
+            writing_requests[f"cover-{job_id}"] = cover_letter_request(user_data, job["job_json"], job["degree"], job["degree_reason"])
+        texts = await run_batch(writing_requests, poll_seconds)
+
+        # 3) PDFs, processed table and Gist, same as the regular writer.
+        # Jobs finish concurrently so their PDFs render across the PDF worker processes.
+        finishing = {}
+        for job_id, job in jobs.items():
+            resume_response = texts.get(f"resume-{job_id}")
+            cover_letter_text = texts.get(f"cover-{job_id}")
+            if resume_response is None or cover_letter_text is None:
+                print(f"Batch generation failed for job id={job_id}, returning it to the queue.")
+                fail_writing_job(job_id, "No resume or cover letter result in the batch")
+                continue
+            resume_text, feedback = split_resume_feedback(resume_response)
+            finishing[job_id] = finish_written_job(job_id, job["url"], job["job_title"], job["job_company"], resume_text, feedback, cover_letter_text)
+
+        results = await asyncio.gather(*finishing.values(), return_exceptions=True)
+        for job_id, result in zip(finishing, results):
+            if isinstance(result, Exception):
+                print(f"Error finishing job id={job_id}: {result}")
+                fail_writing_job(job_id, result)
+            else:
+                written.append(job_id)
+    except BaseException:
+        # Return anything still claimed so the next run picks it up
+        for job_id in jobs:
+            if job_id not in written:
+                release_writing_job(job_id)
+        raise
+
+    print(f"Bulk wrote {len(written)}/{len(rows)} jobs.")
+    return written
+
+async def bulk_write_loop(email_queue=None):
+    """Run the bulk writer whenever scraped jobs are waiting, giving the scraper time to finish a pasted list first."""
+    collect_seconds = int(config("BATCH_COLLECT_SECONDS"))
+    while True:
+        try:
+            written = await run_bulk_writing()
+        except Exception as e:
+            logging.error(f"Bulk writing failed: {e}")
+            written = []
+        if written and email_queue is not None:
+            await email_queue.put(None)
+
+        await bus.wait("scraped", IDLE_RECHECK_SECONDS)
+        await asyncio.sleep(collect_seconds)
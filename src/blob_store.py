@@ -0,0 +1,60 @@
+import zlib
+import hashlib
+import zstandard
+
+# Content-addressed store for the large per-job payloads: scraped job_data and the
+# final resume, cover letter and feedback. A blob is keyed by the sha256 of its
+# text and stored compressed, so identical payloads (reposts, rewritten jobs)
+# are kept once. jobs rows only hold the hash in their *_blob columns, which keeps
+# the jobs table small and the GUI list queries fast.
+# Blobs are compressed with zstd. Each blob records its codec, so zlib blobs written
+# before zstandard was required stay readable.
+
+# jobs columns whose payload moved to the store: column -> column holding the hash
+BLOB_COLUMNS = {
+    "job_data": "job_data_blob",
+    "resume": "resume_blob",
+    "cover_letter": "cover_letter_blob",
+    "feedback": "feedback_blob"
+}
+
+ZSTD_LEVEL = 10
+
+def _compress(data):
+    return "zstd", zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+
+def _decompress(codec, data):
+    if codec == "zstd":
+        return zstandard.ZstdDecompressor().decompress(data)
+    if codec == "zlib":
+        return zlib.decompress(data)
+    raise ValueError(f"Unknown blob codec: {codec}")
+
+def put(conn, text):
+    """Store text (unless an identical blob exists) and return its hash. None stays None. Does not commit."""
+    if text is None:
+        return None
+    data = text.encode("utf-8")
+    digest = hashlib.sha256(data).hexdigest()
+    if conn.execute("SELECT 1 FROM blobs WHERE hash=?", (digest,)).fetchone() is None:
+        codec, compressed = _compress(data)
+        conn.execute(
+            "INSERT OR IGNORE INTO blobs (hash, codec, size, data) VALUES (?, ?, ?, ?)",
+            (digest, codec, len(data), compressed)
+        )
+    return digest
+
+def get(conn, digest):
+    """Text of the blob with this hash, or None for a missing hash."""
+    if not digest:
+        return None
+    row = conn.execute("SELECT codec, data FROM blobs WHERE hash=?", (digest,)).fetchone()
+    if row is None:
+        return None
+    return _decompress(row[0], row[1]).decode("utf-8")
+
+def collect_garbage(conn):
+    """Delete blobs no job refers to any more (e.g. job_data replaced by a rescrape). Returns the count. Does not commit."""
+    referenced = " UNION ".join(f"SELECT {column} FROM jobs WHERE {column} IS NOT NULL" for column in BLOB_COLUMNS.values())
+    cursor = conn.execute(f"DELETE FROM blobs WHERE hash NOT IN ({referenced})")
+    return cursor.rowcount
@@ -0,0 +1,119 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from playwright.async_api import async_playwright
+from src.settings import config
+
+# Use a real browser user-agent to reduce bot detection
+REAL_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/120.0.0.0 Safari/537.36"
+)
+
+class _Slot:
+    """One reusable browser context and the number of pages it has served."""
+    def __init__(self, index):
+        self.index = index
+        self.context = None
+        self.pages = 0
+
+class BrowserPool:
+    """
+    A long-lived Chromium shared by all scrapes.
+    - Each slot owns a browser context; at most `size` pages are open at once.
+    - A context is recycled after `max_pages` pages or when a scrape crashes it.
+    - The browser is relaunched if it disconnects.
+    """
+    def __init__(self, size, max_pages):
+        self.size = size
+        self.max_pages = max_pages
+        self._playwright = None
+        self._browser = None
+        self._launch_lock = asyncio.Lock()
+        self._slots = asyncio.Queue()
+        for i in range(size):
+            self._slots.put_nowait(_Slot(i))
+
+    async def _get_browser(self):
+        async with self._launch_lock:
+            if self._browser is None or not self._browser.is_connected():
+                if self._playwright is None:
+                    self._playwright = await async_playwright().start()
+                self._browser = await self._playwright.chromium.launch(headless=True)
+                logging.info("Browser pool: launched Chromium")
+            return self._browser
+
+    async def _get_context(self, slot):
+        browser = await self._get_browser()
+        if slot.context is None or slot.context.browser is not browser:
+            slot.context = await browser.new_context(
+                java_script_enabled=True,
+                user_agent=REAL_USER_AGENT
+            )
+            slot.pages = 0
+        return slot.context
+
+    async def _recycle(self, slot):
+        if slot.context is not None:
+            try:
+                await slot.context.close()
+            except Exception:
+                pass
+        slot.context = None
+        slot.pages = 0
+
+    @asynccontextmanager
+    async def page(self):
+        """Borrow a fresh page from a pooled context; it is closed when the block exits."""
+        slot = await self._slots.get()
+        try:
+            context = await self._get_context(slot)
+            page = await context.new_page()
+            try:
+                yield page
+            except Exception:
+                # A crashed page can leave the context unusable; start the next job clean
+                await self._recycle(slot)
+                raise
+            finally:
+                try:
+                    await page.close()
+                except Exception:
+                    pass
+            slot.pages += 1
+            if slot.pages >= self.max_pages:
+                logging.info(f"Browser pool: recycling context {slot.index} after {slot.pages} pages")
+                await self._recycle(slot)
+        finally:
+            self._slots.put_nowait(slot)
+
+    async def close(self):
+        """Close every context, the browser and the Playwright driver."""
+        while not self._slots.empty():
+            await self._recycle(self._slots.get_nowait())
+        if self._browser is not None:
+            try:
+                await self._browser.close()
+            except Exception:
+                pass
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+_pool = None
+
+def get_browser_pool():
+    """Return the process-wide browser pool, creating it from settings on first use."""
+    global _pool
+    if _pool is None:
+        _pool = BrowserPool(int(config("BROWSER_POOL_SIZE")), int(config("BROWSER_RECYCLE_PAGES")))
+    return _pool
+
+async def close_browser_pool():
+    """Shut the pool down (call before the event loop exits)."""
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
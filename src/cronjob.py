@@ -0,0 +1,214 @@
+import sys
+import os
+import logging
+
+# Add the src directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.input import process_jobs as ingest_jobs
+from src.scraper import process_next_job, process_job_batch, scrape_form
+from src.writer import process_next_writing_job as process_next_writing_jon, process_writing_batch, reset_interrupted_writing_jobs
+from src.emailer import check_and_send_emails
+from src.pipeline import run_pipeline
+from src.batch_writer import bulk_write_loop
+from src.events import bus, PollBackoff, start_trigger_listener, IDLE_RECHECK_SECONDS
+from src.llm import get_breaker
+from src.settings import config
+from src.db import DB_PATH, get_connection, transaction
+from src import blob_store
+from src.schema import init_database
+from src.jobs import keep_leases
+import asyncio
+from pathlib import Path
+import win32com.client
+
+# Paths
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+ROOT_DIR = os.path.dirname(BASE_DIR)
+DB_DIR = os.path.dirname(DB_PATH)
+LOG_DIR = os.path.join(BASE_DIR, "logs")
+
+# Ensure necessary directories exist
+os.makedirs(LOG_DIR, exist_ok=True)
+os.makedirs(DB_DIR, exist_ok=True)
+
+# Configure logging
+LOG_FILE = os.path.join(LOG_DIR, "cronjob.log")
+logging.basicConfig(
+    filename=LOG_FILE,
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S"
+)
+
+def initialize_database():
+    """Creates the database if needed and applies any pending schema migrations."""
+    print(f"Checking database path: {DB_PATH}")  # Debugging output
+
+    # Ensure the db file exists
+    if not os.path.exists(DB_PATH):
+        print("Database file not found, creating new one...")
+
+    # Connect to SQLite database
+    conn = get_connection()
+    init_database(conn)
+    with transaction() as conn:
+        removed = blob_store.collect_garbage(conn)
+    if removed:
+        logging.info(f"Removed {removed} unreferenced blobs.")
+    print("Database initialized successfully.")
+
+# Job Processing Loop
+async def process_queue():
+    """
+    Process a job using scraper.py's logic and move only valid ones forward.
+    Returns whether a job was claimed, even if its scrape failed, so the loop only goes idle once the queue is empty.
+    """
+    # Batch mode scrapes several queued jobs at once across pooled pages
+    batch_size = int(config("SCRAPE_BATCH_SIZE"))
+    if batch_size > 1:
+        claimed, scraped = await process_job_batch(batch_size)
+    else:
+        try:
+            result = await process_next_job()  # This now handles scraping, failure cases, etc.
+        except Exception as e:
+            # scrape_job has already moved the job to unable_to_scrape
+            logging.error(f"Scrape failed: {e}")
+            result = False
+        claimed, scraped = result is not None, bool(result)
+
+    if scraped:
+        logging.info("Successfully scraped a job and moved it forward.")
+    elif claimed:
+        logging.info("Claimed job could not be scraped, moving on to the next one.")
+    else:
+        logging.info("No jobs in the queue. Waiting for new jobs...")
+    return bool(claimed)
+        
+def create_desktop_shortcut_if_needed():
+    from win32com.client import Dispatch
+    from pathlib import Path
+
+    desktop = Path(os.path.join(os.environ["USERPROFILE"], "Desktop"))
+    shortcut_path = desktop / "cronjob resume writer.lnk"
+
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute("SELECT value FROM settings WHERE key = ?", ("gui_shortcut_created",))
+        result = cursor.fetchone()
+        if result and result[0] == "1":
+            return
+
+        # Build shortcut to pythonw.exe directly
+        target = str(Path(ROOT_DIR) / "venv" / "Scripts" / "pythonw.exe")
+        arguments = str(Path(ROOT_DIR) / "src" / "gui" / "start_gui.py")
+        working_dir = str(Path(ROOT_DIR))
+        icon_path = str(Path(ROOT_DIR) / "src" / "gui" / "assets" / "cronjob.ico")
+
+        shell = Dispatch("WScript.Shell")
+        shortcut = shell.CreateShortCut(str(shortcut_path))
+        shortcut.Targetpath = target
+        shortcut.Arguments = arguments
+        shortcut.WorkingDirectory = working_dir
+        shortcut.IconLocation = icon_path
+        shortcut.WindowStyle = 7  # Minimized
+
+        try:
+            shortcut.save()
+            logging.info(f"GUI shortcut created at {shortcut_path}")
+            cursor.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", ("gui_shortcut_created", "1"))
+            conn.commit()
+        except Exception as e:
+            logging.warning(f"Could not create shortcut at {shortcut_path}: {e}")
+
+    except Exception as e:
+        logging.error(f"Failed during shortcut creation: {e}")
+        conn.rollback()
+
+# Main Execution Loop
+async def main():
+    logging.info("Cronjob Pipeline Started.")
+    
+    # Check and initialize database
+    initialize_database()
+    create_desktop_shortcut_if_needed()
+    logging.info("Cronjob Pipeline Initialized. Ready to start.")
+
+    # Concurrent stage workers instead of the serial loop below
+    if bool(int(config("PIPELINE_MODE"))):
+        await run_pipeline()
+        return
+
+    # Pick up jobs left mid-write by a previous run, then keep this process's job leases alive
+    reset_interrupted_writing_jobs()
+    background_tasks = [asyncio.create_task(keep_leases())]
+
+    # Bulk mode writes through the Batch API in the background while this loop keeps scraping
+    bulk_writer = bool(int(config("BULK_WRITER")))
+    if bulk_writer:
+        background_tasks.append(asyncio.create_task(bulk_write_loop()))
+
+    trigger_listener = await start_trigger_listener()
+    gist_backoff = PollBackoff(int(config("GIST_POLL_MIN")), int(config("GIST_POLL_MAX")))
+    loop = asyncio.get_running_loop()
+    next_gist_poll = 0
+
+    try:
+        while True:
+            # A background task that crashed stops the loop with its exception, like a worker in run_pipeline
+            for task in background_tasks:
+                if task.done():
+                    task.result()
+
+            # Run input processing, backing off while the Gist stays empty
+            gist_enabled = bool(int(config("GIST_INPUT")))
+            if gist_enabled and loop.time() >= next_gist_poll:
+                new_jobs = ingest_jobs()
+                next_gist_poll = loop.time() + gist_backoff.update(new_jobs > 0)
+
+            # Process queued jobs
+            job_claimed = await process_queue()  # Use await now
+
+            # Run the writer (several jobs at once in batch mode, paced by the OpenAI rate limiter)
+            write_batch_size = int(config("WRITE_BATCH_SIZE"))
+            if bulk_writer:
+                job_written = False
+            elif write_batch_size > 1:
+                job_written = await process_writing_batch(write_batch_size) > 0
+            else:
+                job_written = await process_next_writing_jon()
+
+            # Send emails for completed jobs
+            check_and_send_emails()
+
+            # Go straight to the next cycle while there is work
+            if job_claimed or job_written:
+                continue
+
+            logging.info("Waiting before next cycle...")
+
+            # Sleep until new jobs are triggered or the Gist is due for another poll
+            wait_time = max(next_gist_poll - loop.time(), 0) if gist_enabled else IDLE_RECHECK_SECONDS
+            # Writing was skipped while the OpenAI circuit breaker is open; retry once it closes
+            if get_breaker().is_open():
+                wait_time = min(wait_time, get_breaker().remaining())
+            # A background task that finishes (i.e. crashed) ends the wait early
+            waiter = asyncio.create_task(bus.wait("queue", wait_time))
+            await asyncio.wait([waiter, *background_tasks], return_when=asyncio.FIRST_COMPLETED)
+            waiter.cancel()
+    finally:
+        for task in background_tasks:
+            task.cancel()
+        await asyncio.gather(*background_tasks, return_exceptions=True)
+        if trigger_listener:
+            trigger_listener.close()
+
+def run():
+    """Run the pipeline until interrupted (entry point used by main.py)."""
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        logging.info("Cronjob pipeline stopped by keyboard interrupt.")
+        print("\nCronjob pipeline stopped by keyboard interrupt.\n")
\ No newline at end of file
@@ -0,0 +1,66 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# Shared SQLite access for the pipeline and the GUI. Every thread keeps one open
+# connection per database file instead of connecting for each query, so sqlite3's
+# per-connection statement cache actually gets reused. The database runs in WAL
+# mode: readers (the GUI polling every few seconds) never block the pipeline's
+# writers, and writers wait on busy_timeout instead of failing with
+# "database is locked".
+
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+DB_PATH = os.path.join(BASE_DIR, "db", "data.db")
+
+BUSY_TIMEOUT_MS = 10000
+CACHE_SIZE_KB = 16000
+STATEMENT_CACHE_SIZE = 256
+
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",  # safe with WAL; only the last commits can be lost on power failure
+    f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}",
+    f"PRAGMA cache_size=-{CACHE_SIZE_KB}",
+    "PRAGMA temp_store=MEMORY"
+)
+
+_local = threading.local()
+
+def _open(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000, cached_statements=STATEMENT_CACHE_SIZE)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+def get_connection(path=None):
+    """This thread's connection to the database, opened on first use and kept open."""
+    path = os.path.abspath(path or DB_PATH)
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    conn = connections.get(path)
+    if conn is None:
+        conn = connections[path] = _open(path)
+    return conn
+
+@contextmanager
+def transaction(path=None):
+    """
+    Yield this thread's connection and commit when the block ends (roll back on error).
+    Async callers share the thread's connection, so never await inside the block.
+    """
+    conn = get_connection(path)
+    try:
+        yield conn
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+def close_connections():
+    """Close the connections opened by the calling thread."""
+    for conn in getattr(_local, "connections", {}).values():
+        conn.close()
+    _local.connections = {}
@@ -0,0 +1,100 @@
+import re
+import json
+import random
+import hashlib
+from src.settings import config
+from src.db import get_connection, transaction
+
+# Cache of degree-judge answers (approach, reason, job title, company) so reposts and
+# near-identical postings skip the JUDGE_MODEL call.
+# - Exact hits: sha256 of the normalized description.
+# - Near duplicates: MinHash signatures over 5-word shingles, compared against every
+#   cached posting (a few thousand rows at most, so a linear scan is fine).
+# Entries are tied to a hash of the user's education; lookups only match the current
+# one, and the first access after it changes clears the stale entries.
+# A hit supplies the degree decision; the title and company the extractor found in
+# job_data win over the cached ones, which may belong to another posting.
+
+SHINGLE_SIZE = 5
+NUM_PERMUTATIONS = 64
+_PRIME = (1 << 61) - 1
+_rng = random.Random(1729)  # fixed seed: signatures must be comparable across runs
+PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERMUTATIONS)]
+
+# Education hash the cache was last purged for in this process
+_purged_for = None
+
+def normalize(text):
+    return " ".join(re.findall(r"[a-z0-9]+", (text or "").lower()))
+
+def education_hash(user_data):
+    education = json.dumps(user_data.get("education", []), sort_keys=True)
+    return hashlib.sha256(education.encode("utf-8")).hexdigest()
+
+def minhash(normalized_text):
+    words = normalized_text.split()
+    shingles = {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(max(len(words) - SHINGLE_SIZE + 1, 1))}
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big") for s in shingles]
+    return [min((a * h + b) % _PRIME for h in hashes) for a, b in PERMUTATIONS]
+
+def similarity(signature, other):
+    """Estimated Jaccard similarity of the two postings' shingle sets."""
+    return sum(1 for x, y in zip(signature, other) if x == y) / NUM_PERMUTATIONS
+
+def _connect(current_education_hash):
+    global _purged_for
+    if _purged_for != current_education_hash:
+        # Decisions made against different education data are no longer valid
+        with transaction() as conn:
+            conn.execute("DELETE FROM degree_cache WHERE education_hash != ?", (current_education_hash,))
+        _purged_for = current_education_hash
+    return get_connection()
+
+def _with_posting_details(judgment, job_data):
+    """The cached judgment with the title and company from job_data where the extractor found them."""
+    approach, explanation, job_title, job_company = judgment
+    title = (job_data.get("title") or "").strip()
+    company = (job_data.get("company") or "").strip()
+    return approach, explanation, title if title and title != "Unknown" else job_title, company or job_company
+
+def lookup(job_data, user_data):
+    """Return a cached (approach, explanation, job_title, job_company) for this posting or a near duplicate, else None."""
+    text = normalize(job_data.get("description"))
+    if not text:
+        return None
+    current_education = education_hash(user_data)
+    conn = _connect(current_education)
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT degree, degree_reason, job_title, job_company FROM degree_cache WHERE description_hash=? AND education_hash=?",
+        (hashlib.sha256(text.encode("utf-8")).hexdigest(), current_education)
+    )
+    row = cursor.fetchone()
+    if row:
+        return _with_posting_details(tuple(row), job_data)
+
+    threshold = float(config("DEGREE_CACHE_SIMILARITY"))
+    signature = minhash(text)
+    best, best_score = None, threshold
+    cursor.execute(
+        "SELECT signature, degree, degree_reason, job_title, job_company FROM degree_cache WHERE education_hash=?",
+        (current_education,)
+    )
+    for cached_signature, *judgment in cursor.fetchall():
+        score = similarity(signature, json.loads(cached_signature))
+        if score >= best_score:
+            best, best_score = tuple(judgment), score
+    return _with_posting_details(best, job_data) if best else None
+
+def store(job_data, user_data, judgment):
+    """Remember the judge's (approach, explanation, job_title, job_company) for this posting."""
+    text = normalize(job_data.get("description"))
+    if not text:
+        return
+    _connect(education_hash(user_data))
+    with transaction() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO degree_cache (description_hash, education_hash, signature, degree, degree_reason, job_title, job_company) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (hashlib.sha256(text.encode("utf-8")).hexdigest(), education_hash(user_data), json.dumps(minhash(text)), *judgment)
+        )
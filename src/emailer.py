@@ -1,11 +1,10 @@
 import os
-import sqlite3
 import smtplib
 import ssl
 from email.message import EmailMessage
 from src.settings import config
-
-DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "db", "data.db")
+from src.db import get_connection, transaction
+from src import blob_store
 
 SMTP_SERVER = config("SMTP_SERVER")
 SMTP_PORT = config("SMTP_PORT")
@@ -22,27 +21,26 @@ def check_and_send_emails():
         # print("Email sending is disabled.")
         return
 
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+    cursor = get_connection().cursor()
 
     # Grab all rows in 'processed' that haven't been emailed yet
     cursor.execute("""
         SELECT id, job_title, job_company, degree, degree_reason, started_at, finished_at,
-               feedback, resume_pdf, cover_letter_pdf
-        FROM processed
-        WHERE emailed=0
+               feedback_blob, resume_pdf, cover_letter_pdf
+        FROM jobs
+        WHERE state='written' AND emailed=0
     """)
     rows = cursor.fetchall()
 
     if not rows:
         # print("No new processed entries to email.")
-        conn.close()
         return
 
     # For each row, send an email, then update
     for row in rows:
         (job_id, job_title, job_company, degree, degree_reason, started_at, finished_at,
-         feedback, resume_pdf, cover_letter_pdf) = row
+         feedback_blob, resume_pdf, cover_letter_pdf) = row
+        feedback = blob_store.get(get_connection(), feedback_blob)
 
         # Build and send the email
         send_email_with_attachments(
@@ -52,10 +50,8 @@ def check_and_send_emails():
         )
 
         # Update the DB to mark emailed=1 (true)
-        cursor.execute("UPDATE processed SET emailed=1 WHERE id=?", (job_id,))
-        conn.commit()
-
-    conn.close()
+        with transaction() as conn:
+            conn.execute("UPDATE jobs SET emailed=1 WHERE id=?", (job_id,))
 
 def send_email_with_attachments(job_id, job_title, job_company,
                                 degree, degree_reason, started_at, finished_at,
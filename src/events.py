@@ -0,0 +1,75 @@
+import asyncio
+import logging
+import socket
+from src.settings import config
+
+# Wakeups for the pipeline: an in-process event bus plus a localhost UDP trigger
+# so other processes (the GUI, a Gist ingest thread) can wake the workers.
+TRIGGER_HOST = "127.0.0.1"
+
+# Safety net in case a trigger datagram is lost; idle cost is one check a minute
+IDLE_RECHECK_SECONDS = 60
+
+class EventBus:
+    """Named asyncio events that workers wait on instead of sleeping."""
+    def __init__(self):
+        self._events = {}
+
+    def _event(self, topic):
+        if topic not in self._events:
+            self._events[topic] = asyncio.Event()
+        return self._events[topic]
+
+    def notify(self, topic):
+        """Wake every worker waiting on topic (must be called from the event loop thread)."""
+        self._event(topic).set()
+
+    async def wait(self, topic, timeout=None):
+        """Wait until topic is notified or timeout passes. Returns True if notified."""
+        event = self._event(topic)
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+            notified = True
+        except asyncio.TimeoutError:
+            notified = False
+        event.clear()
+        return notified
+
+bus = EventBus()
+
+class PollBackoff:
+    """Adaptive poll interval: back to the minimum after a hit, doubled after each miss."""
+    def __init__(self, minimum, maximum):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.delay = minimum
+
+    def update(self, found):
+        self.delay = self.minimum if found else min(self.delay * 2, self.maximum)
+        return self.delay
+
+def fire_trigger(topic="queue"):
+    """Send a wakeup to the running pipeline. Silently does nothing if no pipeline is listening."""
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.sendto(topic.encode("utf-8"), (TRIGGER_HOST, int(config("TRIGGER_PORT"))))
+    except OSError:
+        pass
+
+class _TriggerProtocol(asyncio.DatagramProtocol):
+    def datagram_received(self, data, addr):
+        topic = data.decode("utf-8", errors="ignore").strip()
+        if topic:
+            bus.notify(topic)
+
+async def start_trigger_listener():
+    """Listen for local triggers and forward them to the event bus. Returns the transport, or None."""
+    loop = asyncio.get_running_loop()
+    port = int(config("TRIGGER_PORT"))
+    try:
+        transport, _ = await loop.create_datagram_endpoint(_TriggerProtocol, local_addr=(TRIGGER_HOST, port))
+    except OSError as e:
+        logging.warning(f"Could not listen for triggers on port {port}: {e}. Falling back to periodic checks.")
+        return None
+    logging.info(f"Listening for triggers on {TRIGGER_HOST}:{port}")
+    return transport
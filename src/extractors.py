@@ -0,0 +1,167 @@
+import re
+import logging
+import requests
+from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
+from src.http_fetch import REQUEST_HEADERS, HTTP_TIMEOUT, StaticPageParser, find_job_posting, html_to_text, fetch_html
+
+# Registry of structured extractors keyed by domain. Each returns job_data with a
+# precise title, company, description and form fields, or None to let the generic
+# scrape handle the page.
+# - API extractors read the job board's public JSON endpoint and need no page HTML.
+# - HTML extractors parse a page that was already fetched (over HTTP or in the browser).
+EXTRACTORS = []
+
+def register_extractor(name, domains=None, needs_html=False):
+    """Register an extractor for the given domains (None = any domain, tried after site-specific ones)."""
+    def decorator(func):
+        EXTRACTORS.append({"name": name, "domains": domains, "needs_html": needs_html, "func": func})
+        # Site-specific extractors always run before generic ones
+        EXTRACTORS.sort(key=lambda entry: entry["domains"] is None)
+        return func
+    return decorator
+
+def _host(url):
+    return (urlparse(url).hostname or "").lower()
+
+def _matches(entry, host):
+    if entry["domains"] is None:
+        return True
+    return any(host == domain or host.endswith("." + domain) for domain in entry["domains"])
+
+def extract_job(url, page_html=None):
+    """
+    Run the registry for url. Without page_html only API extractors run; with it only HTML
+    extractors run. Returns job_data tagged with the extractor name, or None.
+    """
+    host = _host(url)
+    for entry in EXTRACTORS:
+        if entry["needs_html"] != (page_html is not None) or not _matches(entry, host):
+            continue
+        try:
+            job_data = entry["func"](url, page_html)
+        except (requests.RequestException, ValueError, KeyError, TypeError) as e:
+            logging.info(f"Extractor '{entry['name']}' failed for {url}: {e}")
+            continue
+        if job_data and job_data.get("description"):
+            job_data["extractor"] = entry["name"]
+            return job_data
+    return None
+
+def _get_json(url):
+    response = requests.get(url, headers={**REQUEST_HEADERS, "Accept": "application/json"}, timeout=HTTP_TIMEOUT)
+    response.raise_for_status()
+    return response.json()
+
+def _job_data(title, company, description, form_fields=None):
+    return {
+        "title": (title or "").strip() or "Unknown",
+        "company": (company or "").strip(),
+        "description": description.strip(),
+        "form_fields": form_fields or []
+    }
+
+@register_extractor("greenhouse", domains=["greenhouse.io"])
+def extract_greenhouse(url, page_html=None):
+    parsed = urlparse(url)
+    query = parse_qs(parsed.query)
+    match = re.search(r"/([^/]+)/jobs/(\d+)", parsed.path)
+    if match:
+        board, job_id = match.groups()
+    elif "for" in query and ("token" in query or "gh_jid" in query):
+        board, job_id = query["for"][0], (query.get("token") or query["gh_jid"])[0]
+    else:
+        return None
+
+    data = _get_json(f"https://boards-api.greenhouse.io/v1/boards/{board}/jobs/{job_id}?questions=true")
+    form_fields = []
+    for question in data.get("questions", []):
+        for field in question.get("fields", []):
+            form_fields.append({
+                "type": field.get("type", "unknown"),
+                "name": field.get("name", "unknown"),
+                "placeholder": "",
+                "label": question.get("label", "")
+            })
+    location = (data.get("location") or {}).get("name", "")
+    description = html_to_text(data.get("content", ""))
+    if location:
+        description = f"Location: {location}\n{description}"
+    return _job_data(data.get("title"), data.get("company_name") or board, description, form_fields)
+
+@register_extractor("lever", domains=["lever.co"])
+def extract_lever(url, page_html=None):
+    parts = [part for part in urlparse(url).path.split("/") if part]
+    if len(parts) < 2:
+        return None
+    company, posting_id = parts[0], parts[1]
+
+    data = _get_json(f"https://api.lever.co/v0/postings/{company}/{posting_id}")
+    sections = [data.get("descriptionPlain", "")]
+    for block in data.get("lists", []):
+        sections.append(f"{block.get('text', '')}\n{html_to_text(block.get('content', ''))}")
+    sections.append(data.get("additionalPlain", ""))
+    categories = data.get("categories") or {}
+    header = " | ".join(value for value in (categories.get("location"), categories.get("team"), categories.get("commitment")) if value)
+    description = "\n\n".join(section.strip() for section in [header] + sections if section and section.strip())
+    return _job_data(data.get("text"), company, description)
+
+@register_extractor("ashby", domains=["ashbyhq.com"])
+def extract_ashby(url, page_html=None):
+    parts = [part for part in urlparse(url).path.split("/") if part]
+    if len(parts) < 2:
+        return None
+    organization, job_id = parts[0], parts[1]
+
+    data = _get_json(f"https://api.ashbyhq.com/posting-api/job-board/{organization}")
+    for job in data.get("jobs", []):
+        if job.get("id") == job_id:
+            description = job.get("descriptionPlain") or html_to_text(job.get("descriptionHtml", ""))
+            location = job.get("location", "")
+            if location:
+                description = f"Location: {location}\n{description}"
+            return _job_data(job.get("title"), organization, description)
+    return None
+
+@register_extractor("workday", domains=["myworkdayjobs.com"])
+def extract_workday(url, page_html=None):
+    parsed = urlparse(url)
+    parts = [part for part in parsed.path.split("/") if part]
+    if "job" not in parts or parts.index("job") == 0:
+        return None
+    job_index = parts.index("job")
+    site = parts[job_index - 1]
+    tenant = parsed.hostname.split(".")[0]
+    job_path = "/".join(parts[job_index:])
+
+    data = _get_json(f"https://{parsed.hostname}/wday/cxs/{tenant}/{site}/{job_path}")
+    info = data.get("jobPostingInfo") or {}
+    company = (data.get("hiringOrganization") or {}).get("name") or tenant
+    description = html_to_text(info.get("jobDescription", ""))
+    location = info.get("location", "")
+    if location:
+        description = f"Location: {location}\n{description}"
+    return _job_data(info.get("title"), company, description)
+
+@register_extractor("icims", domains=["icims.com"])
+def extract_icims(url, page_html=None):
+    # iCIMS renders the posting inside an iframe; in_iframe=1 returns that document directly
+    parsed = urlparse(url)
+    query = parse_qs(parsed.query)
+    query["in_iframe"] = ["1"]
+    iframe_url = urlunparse(parsed._replace(query=urlencode(query, doseq=True)))
+    iframe_html, _ = fetch_html(iframe_url)
+    if not iframe_html:
+        return None
+    return extract_json_ld(url, iframe_html)
+
+@register_extractor("jsonld", needs_html=True)
+def extract_json_ld(url, page_html):
+    """Generic: any page carrying schema.org JobPosting markup."""
+    parser = StaticPageParser()
+    parser.feed(page_html)
+    posting = find_job_posting(parser.json_ld)
+    if not posting:
+        return None
+    organization = posting.get("hiringOrganization")
+    company = organization.get("name", "") if isinstance(organization, dict) else ""
+    return _job_data(posting.get("title"), company, html_to_text(posting.get("description", "")), parser.form_fields)
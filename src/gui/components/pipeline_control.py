@@ -4,12 +4,13 @@ import os
 import signal
 import sys
 import logging
-import sqlite3
 import time
 import psutil
 import threading
 import queue
 import win32con
+from src.db import get_connection
+from src.schema import init_database
 
 class PipelineControl(customtkinter.CTkFrame):
     def __init__(self, parent):
@@ -50,72 +51,8 @@ class PipelineControl(customtkinter.CTkFrame):
             
             # Initialize the database first
             db_path = os.path.join(workspace_dir, "db", "data.db")
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-            
-            # Create tables if they don't exist
-            cursor.executescript("""
-                CREATE TABLE IF NOT EXISTS queue (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    url TEXT UNIQUE NOT NULL,
-                    status TEXT DEFAULT 'pending',
-                    added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                );
-                CREATE TABLE IF NOT EXISTS processing (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    url TEXT UNIQUE NOT NULL,
-                    job_title TEXT,
-                    job_company TEXT,
-                    degree TEXT,
-                    degree_reason TEXT,
-                    feedback TEXT,
-                    resume TEXT,
-                    resume_pdf TEXT,
-                    cover_letter TEXT,
-                    cover_letter_pdf TEXT,
-                    status TEXT DEFAULT 'scraping',
-                    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    job_data JSON
-                );
-                CREATE TABLE IF NOT EXISTS processed (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    url TEXT UNIQUE NOT NULL,
-                    job_title TEXT,
-                    job_company TEXT,
-                    degree TEXT,
-                    degree_reason TEXT,
-                    feedback TEXT,
-                    resume TEXT,
-                    resume_pdf TEXT,
-                    cover_letter TEXT,
-                    cover_letter_pdf TEXT,
-                    status TEXT,
-                    started_at TIMESTAMP,
-                    finished_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    emailed BOOLEAN DEFAULT FALSE,
-                    job_data JSON
-                );
-                CREATE TABLE IF NOT EXISTS unable_to_scrape (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    url TEXT UNIQUE NOT NULL,
-                    error TEXT,
-                    added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    job_title TEXT,
-                    job_company TEXT,
-                    degree TEXT,
-                    degree_reason TEXT,
-                    feedback TEXT,
-                    resume TEXT,
-                    resume_pdf TEXT,
-                    cover_letter TEXT,
-                    cover_letter_pdf TEXT,
-                    submission_status TEXT,
-                    started_at TIMESTAMP,
-                    job_data JSON
-                );
-            """)
-            conn.commit()
-            conn.close()
+            conn = get_connection(db_path)
+            init_database(conn)
             
             # Start the process in a new console window
             if sys.platform == "win32":
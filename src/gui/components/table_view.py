@@ -1,12 +1,13 @@
 import customtkinter
 import tkinter as tk
 from tkinter import ttk
-import sqlite3
 import pandas as pd
 import json
 from datetime import datetime
 import os
 import logging
+from src.db import get_connection
+from src import blob_store
 
 customtkinter.set_appearance_mode("dark")
 
@@ -152,10 +153,8 @@ class DatabaseTableView(customtkinter.CTkFrame):
     def refresh_data(self):
         """Fetch fresh data from database and update display."""
         try:
-            conn = sqlite3.connect(self.db_path)
             query = f"SELECT * FROM {self.table_name} ORDER BY id DESC"
-            df = pd.read_sql_query(query, conn)
-            conn.close()
+            df = pd.read_sql_query(query, get_connection(self.db_path))
             
             # Clear existing items
             self.tree.delete(*self.tree.get_children())
@@ -253,6 +252,9 @@ class DatabaseTableView(customtkinter.CTkFrame):
         # Format and display data
         text.insert("end", f"=== {self.table_name} Details ===\n\n")
         for col, val in zip(columns, values):
+            # Large payloads live in the blob store; the list only carries their hash
+            if col.endswith("_blob") and str(val) not in ("", "None"):
+                col, val = col[:-len("_blob")], blob_store.get(get_connection(self.db_path), str(val))
             # Try to pretty print JSON fields
             try:
                 if isinstance(val, str) and (val.startswith("{") or val.startswith("[")):
@@ -1,7 +1,7 @@
 import os
-import sqlite3
 from dotenv import load_dotenv
 from src.settings import DEFAULTS
+from src.db import get_connection, transaction
 import logging
 
 # Motivational quotes (mostly dry wit and stoicism)
@@ -120,23 +120,20 @@ class ConfigManager:
         
     def initialize_database(self):
         """Create settings table if it doesn't exist."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS settings (
-                key TEXT PRIMARY KEY,
-                value TEXT
-            )
-        """)
-        
-        # Insert default values if they don't exist
-        for key, value in DEFAULTS.items():
-            cursor.execute("INSERT OR IGNORE INTO settings (key, value) VALUES (?, ?)", (key, value))
-            logging.info(f"Inserted default value for {key}: {value}")
-        
-        conn.commit()
-        conn.close()
+        with transaction(self.db_path) as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS settings (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                )
+            """)
+            
+            # Insert default values if they don't exist
+            for key, value in DEFAULTS.items():
+                cursor.execute("INSERT OR IGNORE INTO settings (key, value) VALUES (?, ?)", (key, value))
+                logging.info(f"Inserted default value for {key}: {value}")
         
     def get(self, key, default=None):
         """Get a setting value, checking both .env and database."""
@@ -146,12 +143,10 @@ class ConfigManager:
         #     return env_value
             
         # Then check database
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cursor = get_connection(self.db_path).cursor()
         
         cursor.execute("SELECT value FROM settings WHERE key=?", (key,))
         row = cursor.fetchone()
-        conn.close()
         
         if row:
             return row[0]
@@ -159,30 +154,19 @@ class ConfigManager:
         
     def set(self, key, value):
         """Set a single setting in the database."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute(
-            "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
-            (key, value)
-        )
-        
-        conn.commit()
-        conn.close()
+        with transaction(self.db_path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
+                (key, value)
+            )
         
     def save_settings(self, settings_dict):
         """Save multiple settings at once."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        for key, value in settings_dict.items():
-            cursor.execute(
+        with transaction(self.db_path) as conn:
+            conn.executemany(
                 "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
-                (key, value)
+                settings_dict.items()
             )
-            
-        conn.commit()
-        conn.close()
         
     def get_all_settings(self):
         """Get all settings as a dictionary."""
@@ -193,12 +177,10 @@ class ConfigManager:
         #     settings[key] = os.getenv(key)
             
         # Then get database settings (overwriting env vars if same key)
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cursor = get_connection(self.db_path).cursor()
         
         cursor.execute("SELECT key, value FROM settings")
         for row in cursor.fetchall():
             settings[row[0]] = row[1]
             
-        conn.close()
         return settings 
\ No newline at end of file
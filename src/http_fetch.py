@@ -0,0 +1,158 @@
+import re
+import json
+import logging
+import requests
+import html
+from html.parser import HTMLParser
+from src.browser_pool import REAL_USER_AGENT
+
+# Plain HTTP fetch + parse for job pages that ship their content in static HTML
+# or JSON-LD JobPosting markup (see extractors.py). scrape_form only launches the
+# browser when this result fails the usual content check.
+
+HTTP_TIMEOUT = 10
+REQUEST_HEADERS = {
+    "User-Agent": REAL_USER_AGENT,
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+SKIP_TAGS = {"script", "style", "noscript", "template", "svg", "head"}
+BLOCK_TAGS = {
+    "p", "div", "br", "li", "ul", "ol", "tr", "section", "article", "header", "footer",
+    "h1", "h2", "h3", "h4", "h5", "h6", "table", "main", "aside", "nav", "form"
+}
+FORM_TAGS = {"input", "select", "textarea", "button"}
+
+class StaticPageParser(HTMLParser):
+    """Collects visible text, the first <h1>, <title>, JSON-LD blocks and form fields from static HTML."""
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.text_parts = []
+        self.json_ld = []
+        self.form_fields = []
+        self.h1 = ""
+        self.page_title = ""
+        self._skip_depth = 0
+        self._json_ld_buffer = None
+        self._h1_buffer = None
+        self._in_title = False
+        self._button = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "script" and (attrs.get("type") or "").lower() == "application/ld+json":
+            self._json_ld_buffer = []
+        if tag == "title":
+            self._in_title = True
+        if tag in SKIP_TAGS:
+            self._skip_depth += 1
+            return
+        if tag in BLOCK_TAGS:
+            self.text_parts.append("\n")
+        if tag == "h1" and not self.h1 and self._h1_buffer is None:
+            self._h1_buffer = []
+        if tag in FORM_TAGS:
+            field = {
+                "type": attrs.get("type") or "unknown",
+                "name": attrs.get("name") or attrs.get("id") or "unknown",
+                "placeholder": attrs.get("placeholder") or "",
+                "label": ""
+            }
+            if field["name"] != "unknown":
+                self.form_fields.append(field)
+                if tag == "button":
+                    self._button = field
+
+    def handle_endtag(self, tag):
+        if tag == "script" and self._json_ld_buffer is not None:
+            self.json_ld.append("".join(self._json_ld_buffer))
+            self._json_ld_buffer = None
+        if tag == "title":
+            self._in_title = False
+        if tag in SKIP_TAGS:
+            self._skip_depth = max(self._skip_depth - 1, 0)
+            return
+        if tag == "h1" and self._h1_buffer is not None:
+            self.h1 = " ".join("".join(self._h1_buffer).split())
+            self._h1_buffer = None
+        if tag == "button" and self._button is not None:
+            self._button["label"] = " ".join(self._button["label"].split())
+            self._button = None
+        if tag in BLOCK_TAGS:
+            self.text_parts.append("\n")
+
+    def handle_data(self, data):
+        if self._json_ld_buffer is not None:
+            self._json_ld_buffer.append(data)
+        elif self._in_title:
+            self.page_title += data
+        elif self._skip_depth == 0:
+            self.text_parts.append(data)
+            if self._h1_buffer is not None:
+                self._h1_buffer.append(data)
+            if self._button is not None:
+                self._button["label"] += data
+
+    def text(self):
+        """Visible text with whitespace collapsed and blank lines removed, similar to innerText."""
+        lines = ("".join(self.text_parts)).split("\n")
+        return "\n".join(" ".join(line.split()) for line in lines if line.strip())
+
+def html_to_text(markup):
+    """Convert an HTML fragment to text. Entity-escaped HTML (common in JSON-LD) is unescaped first."""
+    markup = markup or ""
+    if "&lt;" in markup and "<" not in markup:
+        markup = html.unescape(markup)
+    parser = StaticPageParser()
+    parser.feed(markup)
+    return parser.text()
+
+def find_job_posting(json_ld_blocks):
+    """Return the first JSON-LD object typed JobPosting, searching lists and @graph."""
+    def walk(node):
+        if isinstance(node, list):
+            for item in node:
+                found = walk(item)
+                if found:
+                    return found
+        elif isinstance(node, dict):
+            types = node.get("@type")
+            types = types if isinstance(types, list) else [types]
+            if "JobPosting" in types:
+                return node
+            if "@graph" in node:
+                return walk(node["@graph"])
+        return None
+
+    for block in json_ld_blocks:
+        try:
+            found = walk(json.loads(block.strip()))
+        except ValueError:
+            continue
+        if found:
+            return found
+    return None
+
+def fetch_html(url, extra_headers=None):
+    """GET url and return (html, response) or (None, None) on any failure or non-HTML response."""
+    try:
+        response = requests.get(url, headers={**REQUEST_HEADERS, **(extra_headers or {})}, timeout=HTTP_TIMEOUT)
+    except requests.RequestException as e:
+        logging.info(f"HTTP fetch failed for {url}: {e}")
+        return None, None
+    content_type = response.headers.get("Content-Type", "")
+    if response.status_code != 200 or "html" not in content_type.lower():
+        return None, response
+    return response.text, response
+
+def parse_static_job_page(page_html):
+    """Build generic job_data (same shape as the browser scrape) from static HTML."""
+    parser = StaticPageParser()
+    parser.feed(page_html)
+    title = parser.h1 or re.sub(r"\s+", " ", parser.page_title).strip()
+    return {
+        "title": title or "Unknown",
+        "description": parser.text(),
+        "form_fields": parser.form_fields,
+    }
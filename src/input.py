@@ -1,19 +1,16 @@
 import requests
 import json
 import datetime
-import sqlite3
-import os
 from src.settings import config
+from src.db import get_connection, transaction
+from src.jobs import transition
+from src.events import fire_trigger
 import logging
 
 GITHUB_TOKEN = config("GITHUB_TOKEN")
 GIST_ID = config("GIST_ID")
 GIST_URL = f"https://api.github.com/gists/{GIST_ID}"
 
-# Database path
-BASE_DIR = os.path.dirname(os.path.dirname(__file__))
-DB_PATH = os.path.join(BASE_DIR, "db", "data.db")
-
 # Headers for authentication
 HEADERS = {
     "Authorization": f"token {GITHUB_TOKEN}",
@@ -52,37 +49,29 @@ def update_gist(new_content, updated_count):
         #print("No new jobs to queue. Gist remains unchanged.")
 
 def is_url_in_database(url):
-    """Check if a URL already exists in queue or processing."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("SELECT 1 FROM queue WHERE url = ? UNION SELECT 1 FROM processing WHERE url = ?", (url, url))
-    exists = cursor.fetchone() is not None
-    conn.close()
-    return exists
+    """Check if a URL is already queued, being worked on or processed (failed scrapes can be queued again)."""
+    cursor = get_connection().execute("SELECT 1 FROM jobs WHERE url = ? AND state != 'unable_to_scrape'", (url,))
+    return cursor.fetchone() is not None
 
 def insert_into_queue(url):
-    """Insert a new job URL into the queue if not already present."""
+    """Insert a new job URL into the queue (or requeue a failed one) if not already present."""
     if is_url_in_database(url):
         return False  # Already in queue or processing
 
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("INSERT INTO queue (url, status) VALUES (?, 'pending')", (url,))
-    conn.commit()
-    conn.close()
+    with transaction() as conn:
+        if not transition(conn, "pending", url=url, error=None, write_attempts=0):
+            conn.execute("INSERT INTO jobs (url, state) VALUES (?, 'pending')", (url,))
+
+    # Wake the pipeline right away instead of waiting for its next check
+    fire_trigger("queue")
     return True
 
 def is_url_processed(url):
     """Check if a URL already exists in the processed table."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("SELECT id FROM processed WHERE url = ?", (url,))
-    result = cursor.fetchone()
-    conn.close()
-    return result
+    return get_connection().execute("SELECT id FROM jobs WHERE url = ? AND state = 'written'", (url,)).fetchone()
 
 def process_jobs():
-    """Fetch job URLs, add new ones to the queue, and mark them as queued."""
+    """Fetch job URLs, add new ones to the queue, and mark them as queued. Returns the number of new jobs."""
     #print("process_jobs called")  # Debugging output
     # Check if GIST input is enabled
     gist_input_enabled = bool(int(config("GIST_INPUT")))
@@ -90,14 +79,14 @@ def process_jobs():
     logging.info(f"GIST_INPUT setting: {gist_input_enabled}")
     if not gist_input_enabled:
         # print("GIST input is disabled.")
-        return
+        return 0
 
     # Only fetch job URLs if GIST_INPUT is enabled
     print("Attempting to fetch job URLs...")  # Debugging output
     job_urls = fetch_job_urls()
     if not job_urls:
         # print("No new job URLs found.")
-        return
+        return 0
 
     new_jobs, already_in_queue, marked_done = 0, 0, 0
     updated_urls = []
@@ -132,6 +121,7 @@ def process_jobs():
     # Update Gist with new queued jobs only if needed
     updated_content = "\n".join(updated_urls)
     update_gist(updated_content, new_jobs)
+    return new_jobs
 
 if __name__ == "__main__":
     process_jobs()
\ No newline at end of file
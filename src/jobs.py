@@ -0,0 +1,174 @@
+import os
+import socket
+import asyncio
+import logging
+from src.db import transaction
+from src.settings import config
+from src.events import bus
+
+# Job state machine. Every job is one row of the jobs table from the moment its
+# URL is queued until it is written or given up on:
+#
+#   pending -> scraping -> scraped -> writing -> written
+#      ^         |  |         ^          |  |
+#      +---------+  |         +----------+  |  (lease expired / job returned to the writer queue)
+#                   v                       |
+#          unable_to_scrape <---------------+  (writing failed MAX_WRITE_ATTEMPTS times, see writer.py)
+#                   |
+#                   +-> pending             (the URL is submitted again)
+#
+# A state change is an in-place UPDATE of the indexed state column; job_data and
+# the generated texts stay where they are. The jobs_log_* triggers in schema.py
+# record every change in job_transitions.
+#
+# scraping and writing are leased: claim() moves a job into them in one
+# UPDATE ... RETURNING, stamped with this process's worker_id() and an expiry, so two
+# workers or two pipeline processes never take the same job. The process keeps the
+# ids it claimed in _in_flight until the job leaves the leased state; keep_leases()
+# renews only those leases and returns jobs whose lease ran out (their process died,
+# or a failed worker never released them) to the state they were claimed from.
+
+STATES = ("pending", "scraping", "scraped", "writing", "written", "unable_to_scrape")
+
+TRANSITIONS = {
+    "pending": ("scraping",),
+    "scraping": ("scraped", "unable_to_scrape", "pending"),
+    "scraped": ("writing",),
+    "writing": ("scraped", "written", "unable_to_scrape"),
+    "written": (),
+    "unable_to_scrape": ("pending",)
+}
+
+# Leased state -> state a job returns to when its lease expires
+LEASED_STATES = {
+    "scraping": "pending",
+    "writing": "scraped"
+}
+
+# Timestamp columns set when a job enters these states
+STATE_TIMESTAMPS = {
+    "pending": "added_at",
+    "scraping": "started_at",
+    "written": "finished_at",
+    "unable_to_scrape": "finished_at"
+}
+
+HOSTNAME = socket.gethostname()
+
+# Ids of jobs this process claimed and has not moved out of the leased state yet
+_in_flight = set()
+
+def worker_id():
+    """This process's lease owner id (computed per call, so forked processes get their own)."""
+    return f"{HOSTNAME}:{os.getpid()}"
+
+def _lease_expiry():
+    return f"+{int(config('JOB_LEASE_SECONDS'))} seconds"
+
+def transition(conn, to_state, job_id=None, url=None, from_state=None, worker=None, **fields):
+    """
+    Move the job with job_id (or url) to to_state and set any extra columns given as keywords.
+    Only rows whose current state may move to to_state are changed; with neither job_id nor url
+    every row in from_state moves. With worker, only a job leased by that worker moves.
+    Returns the number of rows changed. Does not commit.
+    """
+    from_states = [state for state, targets in TRANSITIONS.items() if to_state in targets]
+    if from_state is not None:
+        from_states = [state for state in from_states if state == from_state]
+    if not from_states:
+        raise ValueError(f"No transition from {from_state or 'any state'} to {to_state}")
+    if job_id is None and url is None and from_state is None:
+        raise ValueError("transition() needs a job_id, url or from_state")
+
+    assignments = ["state=?"] + [f"{column}=?" for column in fields]
+    if to_state in STATE_TIMESTAMPS:
+        assignments.append(f"{STATE_TIMESTAMPS[to_state]}=CURRENT_TIMESTAMP")
+    if to_state not in LEASED_STATES:
+        assignments.append("lease_owner=NULL, lease_expires_at=NULL")
+    conditions = [f"state IN ({', '.join('?' * len(from_states))})"]
+    params = [to_state, *fields.values(), *from_states]
+    for column, value in (("id", job_id), ("url", url), ("lease_owner", worker)):
+        if value is not None:
+            conditions.append(f"{column}=?")
+            params.append(value)
+
+    cursor = conn.execute(f"UPDATE jobs SET {', '.join(assignments)} WHERE {' AND '.join(conditions)} RETURNING id", params)
+    changed = [row[0] for row in cursor.fetchall()]
+    if to_state not in LEASED_STATES:
+        _in_flight.difference_update(changed)
+    return len(changed)
+
+def claim(conn, from_state, to_state, columns="id, url", url=None, worker=None):
+    """
+    Atomically lease the oldest job in from_state (or the one for url) to worker (default: this process)
+    and move it to to_state.
+    Returns the requested columns of the claimed row, or None. Does not commit.
+    """
+    if to_state not in LEASED_STATES or to_state not in TRANSITIONS[from_state]:
+        raise ValueError(f"Cannot claim from {from_state} into {to_state}")
+    assignments = "state=?, lease_owner=?, lease_expires_at=datetime('now', ?)"
+    if to_state in STATE_TIMESTAMPS:
+        assignments += f", {STATE_TIMESTAMPS[to_state]}=CURRENT_TIMESTAMP"
+    pick = "SELECT id FROM jobs WHERE state=?" + (" AND url=?" if url else "") + " ORDER BY id ASC LIMIT 1"
+    params = [to_state, worker or worker_id(), _lease_expiry(), from_state] + ([url] if url else [])
+
+    # A single statement, so no other connection can claim the row in between
+    cursor = conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ({pick}) RETURNING id, {columns}", params)
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    if worker is None or worker == worker_id():
+        _in_flight.add(row[0])
+    return row[1:]
+
+def in_flight():
+    """Ids of the jobs this process has claimed and is still working on."""
+    return sorted(_in_flight)
+
+def heartbeat(conn, job_ids=None, worker=None):
+    """
+    Extend the leases worker (default: this process) holds on job_ids (default: this process's
+    in-flight jobs). A job the worker stopped working on without releasing it is not renewed,
+    so reclaim_expired() recovers it. Returns the number of leases renewed. Does not commit.
+    """
+    job_ids = in_flight() if job_ids is None else list(job_ids)
+    if not job_ids:
+        return 0
+    cursor = conn.execute(
+        f"UPDATE jobs SET lease_expires_at=datetime('now', ?) WHERE lease_owner=? AND id IN ({', '.join('?' * len(job_ids))})",
+        (_lease_expiry(), worker or worker_id(), *job_ids)
+    )
+    return cursor.rowcount
+
+def reclaim_expired(conn):
+    """
+    Return jobs whose lease expired (or that were left leased without one) to the state they were
+    claimed from. Returns the reclaimed (id, url, state) rows. Does not commit.
+    """
+    reclaimed = []
+    for leased_state, previous_state in LEASED_STATES.items():
+        cursor = conn.execute("""
+            UPDATE jobs SET state=?, lease_owner=NULL, lease_expires_at=NULL
+            WHERE state=? AND (lease_expires_at IS NULL OR lease_expires_at < datetime('now'))
+            RETURNING id, url, state
+        """, (previous_state, leased_state))
+        reclaimed += cursor.fetchall()
+    _in_flight.difference_update(row[0] for row in reclaimed)
+    return reclaimed
+
+async def keep_leases(on_reclaimed=None):
+    """
+    Renew the leases of this process's in-flight jobs and reclaim expired ones every third of the lease time, forever.
+    on_reclaimed is awaited with the reclaimed (id, url, state) rows.
+    """
+    while True:
+        with transaction() as conn:
+            heartbeat(conn)
+            reclaimed = reclaim_expired(conn)
+        if reclaimed:
+            logging.warning(f"Reclaimed {len(reclaimed)} job(s) whose lease expired: {[row[1] for row in reclaimed]}")
+            bus.notify("queue")
+            bus.notify("scraped")
+            if on_reclaimed is not None:
+                await on_reclaimed(reclaimed)
+        await asyncio.sleep(int(config("JOB_LEASE_SECONDS")) / 3)
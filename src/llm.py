@@ -0,0 +1,354 @@
+import re
+import json
+import time
+import random
+import asyncio
+import logging
+from collections import deque
+import httpx
+import openai
+import tiktoken
+from src.settings import config
+from src.db import transaction
+
+# Shared LLM client layer: every OpenAI call in the writer goes through chat() or chat_stream().
+# - Calls are scheduled per model under requests-per-minute and tokens-per-minute
+#   budgets, tightened by the x-ratelimit-* headers the API returns.
+# - Transient failures (429, 5xx, timeouts, connection errors) are retried with
+#   jittered exponential backoff, honoring Retry-After.
+# - A circuit breaker opens after repeated transient failures so writing pauses
+#   while the API is degraded; scraping and email keep running.
+# - run_batch() sends many chat requests through the Batch API instead (bulk writer).
+# - Token usage, including prompt tokens served from OpenAI's prompt cache, is
+#   recorded in the llm_usage table (created by migration 5 in schema.py).
+
+_client = None
+_limiters = {}
+_breaker = None
+
+class StreamInterruptedError(Exception):
+    """A streamed completion broke off after it started (connection dropped, read timeout, error event)."""
+
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+    StreamInterruptedError,
+)
+
+# Raised while iterating a stream that has already started. The SDK only wraps transport errors
+# for the initial request, so mid-stream they arrive as raw httpx exceptions; an error event sent
+# inside the stream is raised as a plain openai.APIError.
+STREAM_ERRORS = (httpx.TransportError, httpx.TimeoutException, openai.APIError)
+
+BATCH_FINAL_STATES = {"completed", "failed", "expired", "cancelled"}
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling OpenAI while the circuit breaker is open."""
+
+def get_client():
+    """Return the process-wide async OpenAI client."""
+    global _client
+    if _client is None:
+        # Retries are handled in chat() so they can feed the circuit breaker
+        _client = openai.AsyncOpenAI(
+            api_key=config("OPENAI_API_KEY"),
+            base_url=config("OPENAI_BASE_URL") or None,
+            max_retries=0
+        )
+    return _client
+
+def estimate_tokens(text, model=None):
+    """Count tokens with the model's tiktoken encoding (o200k_base for models tiktoken does not know)."""
+    try:
+        encoding = tiktoken.encoding_for_model(model)
+    except (KeyError, TypeError):
+        encoding = tiktoken.get_encoding("o200k_base")
+    return len(encoding.encode(text))
+
+def estimate_request_tokens(messages, max_tokens, model=None):
+    """Prompt tokens plus max_tokens, which is what the API counts against the TPM budget."""
+    prompt = sum(estimate_tokens(message["content"], model) + 4 for message in messages)
+    return prompt + max_tokens
+
+def parse_reset(value):
+    """Convert reset headers like '1s', '6m0s' or '250ms' into seconds."""
+    if not value:
+        return 0.0
+    seconds = 0.0
+    for amount, unit in re.findall(r"([\d.]+)(ms|h|m|s)", value):
+        seconds += float(amount) * {"ms": 0.001, "s": 1, "m": 60, "h": 3600}[unit]
+    return seconds
+
+class RateLimiter:
+    """
+    Sliding one-minute window of requests and tokens for one model.
+    Callers queue on a lock, so calls start in order and only as fast as the budget allows.
+    """
+    WINDOW = 60.0
+
+    def __init__(self, rpm, tpm):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._calls = deque()  # (start time, tokens)
+        self._lock = asyncio.Lock()
+        self._paused_until = 0.0
+
+    def _wait_time(self, tokens, now):
+        while self._calls and now - self._calls[0][0] >= self.WINDOW:
+            self._calls.popleft()
+        if now < self._paused_until:
+            return self._paused_until - now
+        if len(self._calls) + 1 > self.rpm:
+            return self._calls[0][0] + self.WINDOW - now
+        used_tokens = sum(t for _, t in self._calls)
+        if self._calls and used_tokens + tokens > self.tpm:
+            # Wait until enough of the window expires to fit this call
+            freed = 0
+            for started, call_tokens in self._calls:
+                freed += call_tokens
+                if used_tokens - freed + tokens <= self.tpm:
+                    return started + self.WINDOW - now
+            return self._calls[-1][0] + self.WINDOW - now
+        return 0.0
+
+    async def acquire(self, tokens):
+        async with self._lock:
+            while True:
+                wait = self._wait_time(tokens, time.monotonic())
+                if wait <= 0:
+                    self._calls.append((time.monotonic(), tokens))
+                    return
+                logging.info(f"Rate limit: waiting {wait:.1f}s before next call")
+                await asyncio.sleep(wait)
+
+    def update_from_headers(self, headers):
+        """Adopt the account's real limits and pause when the API says a budget is used up."""
+        limit_requests = headers.get("x-ratelimit-limit-requests")
+        limit_tokens = headers.get("x-ratelimit-limit-tokens")
+        if limit_requests and limit_requests.isdigit():
+            self.rpm = min(self.rpm, int(limit_requests))
+        if limit_tokens and limit_tokens.isdigit():
+            self.tpm = min(self.tpm, int(limit_tokens))
+
+        now = time.monotonic()
+        if headers.get("x-ratelimit-remaining-requests") == "0":
+            self._paused_until = max(self._paused_until, now + parse_reset(headers.get("x-ratelimit-reset-requests")))
+        if headers.get("x-ratelimit-remaining-tokens") == "0":
+            self._paused_until = max(self._paused_until, now + parse_reset(headers.get("x-ratelimit-reset-tokens")))
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive transient failures and stays open for `cooldown` seconds."""
+    def __init__(self, threshold, cooldown):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+
+    def remaining(self):
+        """Seconds until the breaker lets a trial call through (0 when closed)."""
+        if self.opened_at is None:
+            return 0.0
+        return max(self.opened_at + self.cooldown - time.monotonic(), 0.0)
+
+    def is_open(self):
+        return self.remaining() > 0
+
+    def record_success(self):
+        if self.opened_at is not None:
+            logging.info("OpenAI circuit breaker closed, writing resumed.")
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= self.threshold:
+            # Re-opening after a failed trial call restarts the cooldown
+            self.opened_at = time.monotonic()
+            logging.warning(f"OpenAI circuit breaker open after {self.failures} failures; pausing writing for {self.cooldown:.0f}s.")
+            print(f"OpenAI API degraded, pausing writing for {self.cooldown:.0f}s.")
+
+def get_breaker():
+    global _breaker
+    if _breaker is None:
+        _breaker = CircuitBreaker(int(config("CIRCUIT_BREAKER_THRESHOLD")), float(config("CIRCUIT_BREAKER_COOLDOWN")))
+    return _breaker
+
+def llm_available():
+    """False while the circuit breaker is open."""
+    return not get_breaker().is_open()
+
+async def wait_until_available():
+    """Sleep until the circuit breaker allows calls again."""
+    breaker = get_breaker()
+    while breaker.is_open():
+        await asyncio.sleep(breaker.remaining())
+
+def retry_after_seconds(error):
+    """Read Retry-After / retry-after-ms from an API error response, if any."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return 0.0
+    retry_after_ms = response.headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+    retry_after = response.headers.get("retry-after")
+    try:
+        return float(retry_after) if retry_after else 0.0
+    except ValueError:
+        return 0.0
+
+def backoff_delay(attempt, error):
+    """Full-jitter exponential backoff (1s base, 60s cap), never shorter than Retry-After."""
+    jitter = random.uniform(0, min(60.0, 2 ** attempt))
+    return max(jitter, retry_after_seconds(error))
+
+def record_usage(model, usage):
+    """Store one call's token usage; cached_tokens is the part of the prompt billed at the cached rate."""
+    if not usage:
+        return
+    if not isinstance(usage, dict):
+        usage = usage.model_dump()
+    prompt_tokens = usage.get("prompt_tokens") or 0
+    cached_tokens = (usage.get("prompt_tokens_details") or {}).get("cached_tokens") or 0
+    completion_tokens = usage.get("completion_tokens") or 0
+    logging.info(f"{model}: {prompt_tokens} prompt tokens ({cached_tokens} cached), {completion_tokens} completion tokens")
+
+    with transaction() as conn:
+        conn.execute(
+            "INSERT INTO llm_usage (model, prompt_tokens, cached_tokens, completion_tokens) VALUES (?, ?, ?, ?)",
+            (model, prompt_tokens, cached_tokens, completion_tokens)
+        )
+
+def get_limiter(model):
+    if model not in _limiters:
+        _limiters[model] = RateLimiter(int(config("OPENAI_RPM")), int(config("OPENAI_TPM")))
+    return _limiters[model]
+
+async def _call_with_retries(model, messages, max_tokens, call):
+    """
+    Run call() (one API request) within the model's rate limits, retrying transient failures.
+    Raises CircuitOpenError if the breaker is (or becomes) open.
+    """
+    limiter = get_limiter(model)
+    breaker = get_breaker()
+    max_retries = int(config("OPENAI_MAX_RETRIES"))
+    tokens = estimate_request_tokens(messages, max_tokens, model)
+
+    for attempt in range(max_retries + 1):
+        if breaker.is_open():
+            raise CircuitOpenError(f"OpenAI circuit breaker open for another {breaker.remaining():.0f}s")
+        await limiter.acquire(tokens)
+        try:
+            result = await call()
+        except RETRYABLE_ERRORS as e:
+            breaker.record_failure()
+            if breaker.is_open():
+                raise CircuitOpenError(f"OpenAI circuit breaker opened after {type(e).__name__}") from e
+            if attempt == max_retries:
+                raise
+            delay = backoff_delay(attempt, e)
+            logging.warning(f"OpenAI call failed ({type(e).__name__}), retry {attempt + 1}/{max_retries} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            continue
+
+        breaker.record_success()
+        return result
+
+async def chat(model, messages, temperature, max_tokens):
+    """Run one chat completion and return the stripped response text."""
+    async def call():
+        raw = await get_client().chat.completions.with_raw_response.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            timeout=float(config("OPENAI_TIMEOUT"))
+        )
+        get_limiter(model).update_from_headers(raw.headers)
+        response = raw.parse()
+        record_usage(model, response.usage)
+        return response.choices[0].message.content.strip()
+
+    return await _call_with_retries(model, messages, max_tokens, call)
+
+async def chat_stream(model, messages, temperature, max_tokens, listener):
+    """
+    Like chat(), but streams the completion: listener.feed(delta) gets each text fragment as it
+    arrives, and listener.reset() is called before a retry starts the response over.
+    """
+    async def call():
+        listener.reset()
+        raw = await get_client().chat.completions.with_raw_response.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True,
+            stream_options={"include_usage": True},
+            timeout=float(config("OPENAI_TIMEOUT"))
+        )
+        get_limiter(model).update_from_headers(raw.headers)
+        parts = []
+        try:
+            async for chunk in raw.parse():
+                if chunk.usage:
+                    record_usage(model, chunk.usage)
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+                    listener.feed(chunk.choices[0].delta.content)
+        except STREAM_ERRORS as e:
+            # Retried (and counted by the circuit breaker) like a failed request
+            raise StreamInterruptedError(f"Stream interrupted after {len(parts)} chunks: {type(e).__name__}: {e}") from e
+        return "".join(parts).strip()
+
+    return await _call_with_retries(model, messages, max_tokens, call)
+
+async def run_batch(requests, poll_seconds):
+    """
+    Submit {custom_id: chat request} as one Batch API job, wait for it to finish and
+    return {custom_id: response text}. Requests that failed are left out of the result.
+    """
+    client = get_client()
+    lines = [
+        json.dumps({"custom_id": custom_id, "method": "POST", "url": "/v1/chat/completions", "body": body})
+        for custom_id, body in requests.items()
+    ]
+    input_file = await client.files.create(file=("batch.jsonl", "\n".join(lines).encode("utf-8")), purpose="batch")
+    batch = await client.batches.create(
+        input_file_id=input_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h"
+    )
+    logging.info(f"Submitted batch {batch.id} with {len(requests)} requests.")
+
+    while batch.status not in BATCH_FINAL_STATES:
+        await asyncio.sleep(poll_seconds)
+        try:
+            batch = await client.batches.retrieve(batch.id)
+        except RETRYABLE_ERRORS as e:
+            logging.warning(f"Polling batch {batch.id} failed ({type(e).__name__}), will retry.")
+
+    counts = batch.request_counts
+    logging.info(f"Batch {batch.id} {batch.status}: {counts.completed if counts else '?'} completed, {counts.failed if counts else '?'} failed.")
+
+    # Expired and cancelled batches still return the requests that finished in time
+    results = {}
+    if batch.output_file_id:
+        output = await client.files.content(batch.output_file_id)
+        for line in output.text.splitlines():
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            response = item.get("response") or {}
+            if response.get("status_code") == 200:
+                body = response["body"]
+                record_usage(body.get("model"), body.get("usage"))
+                results[item["custom_id"]] = body["choices"][0]["message"]["content"].strip()
+            else:
+                logging.warning(f"Batch request {item['custom_id']} failed: {item.get('error') or response.get('status_code')}")
+    return results
@@ -0,0 +1,226 @@
+import os
+import json
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+from src.schema import MIGRATIONS, migrate
+
+# Query plans and timings of the hot queries before and after each schema
+# migration, on a throwaway database seeded in the layout used before migration 1:
+#   python -m src.migration_benchmark --jobs 20000
+# Nothing touches db/data.db.
+
+# The four per-status tables migration 1 replaces, as main.py used to create them
+LEGACY_SCHEMA = """
+CREATE TABLE queue (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT UNIQUE NOT NULL, status TEXT DEFAULT 'pending',
+    added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE processing (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT UNIQUE NOT NULL, job_title TEXT, job_company TEXT, degree TEXT,
+    degree_reason TEXT, feedback TEXT, resume TEXT, resume_pdf TEXT, cover_letter TEXT, cover_letter_pdf TEXT,
+    status TEXT DEFAULT 'scraping', started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, job_data JSON
+);
+CREATE TABLE processed (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT UNIQUE NOT NULL, job_title TEXT, job_company TEXT, degree TEXT,
+    degree_reason TEXT, feedback TEXT, resume TEXT, resume_pdf TEXT, cover_letter TEXT, cover_letter_pdf TEXT,
+    status TEXT, started_at TIMESTAMP, finished_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, emailed BOOLEAN DEFAULT FALSE,
+    job_data JSON
+);
+CREATE TABLE unable_to_scrape (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT UNIQUE NOT NULL, error TEXT, added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    job_title TEXT, job_company TEXT, degree TEXT, degree_reason TEXT, feedback TEXT, resume TEXT, resume_pdf TEXT,
+    cover_letter TEXT, cover_letter_pdf TEXT, submission_status TEXT, started_at TIMESTAMP, job_data JSON
+);
+"""
+
+# migration version -> [(query name, SQL before the migration or None, SQL after, params)]
+BENCHMARKS = {
+    1: [
+        ("next queued job",
+         "SELECT id, url FROM queue ORDER BY id ASC LIMIT 1",
+         "SELECT id, url FROM jobs WHERE state='pending' ORDER BY id ASC LIMIT 1", ()),
+        ("next scraped job",
+         "SELECT id, url FROM processing WHERE status='scraped' ORDER BY id ASC LIMIT 1",
+         "SELECT id, url FROM jobs WHERE state='scraped' ORDER BY id ASC LIMIT 1", ()),
+        ("URL already queued",
+         "SELECT 1 FROM queue WHERE url = ? UNION SELECT 1 FROM processing WHERE url = ?",
+         "SELECT 1 FROM jobs WHERE url = ? AND state != 'unable_to_scrape'", "url"),
+        ("jobs to email",
+         "SELECT id FROM processed WHERE emailed=0",
+         "SELECT id FROM jobs WHERE state='written' AND emailed=0", ())
+    ],
+    2: [
+        ("lease heartbeat", None, "SELECT id FROM jobs WHERE lease_owner=?", ("bench:1",)),
+        ("expired leases", None,
+         "SELECT id FROM jobs WHERE state='writing' AND (lease_expires_at IS NULL OR lease_expires_at < datetime('now'))", ())
+    ],
+    3: [
+        ("jobs to email",
+         "SELECT id FROM jobs WHERE state='written' AND emailed=0",
+         "SELECT id FROM jobs WHERE state='written' AND emailed=0", ()),
+        ("lease heartbeat",
+         "SELECT id FROM jobs WHERE lease_owner=?",
+         "SELECT id FROM jobs WHERE lease_owner=?", ("bench:1",))
+    ],
+    4: [
+        ("GUI processed list",
+         "SELECT * FROM processed ORDER BY id DESC",
+         "SELECT * FROM processed ORDER BY id DESC", ()),
+        ("GUI processing list",
+         "SELECT * FROM processing ORDER BY id DESC",
+         "SELECT * FROM processing ORDER BY id DESC", ())
+    ],
+    5: [
+        ("record usage", None,
+         "INSERT INTO llm_usage (model, prompt_tokens, cached_tokens, completion_tokens) VALUES ('gpt-4o', 1800, 1024, 900)", ()),
+        ("usage per model", None,
+         "SELECT model, SUM(prompt_tokens), SUM(cached_tokens), SUM(completion_tokens) FROM llm_usage GROUP BY model", ())
+    ],
+    6: [
+        ("degree cache exact hit", None,
+         "SELECT degree, degree_reason, job_title, job_company FROM degree_cache WHERE description_hash=? AND education_hash=?",
+         ("description-7", "education-current")),
+        ("degree cache near-duplicate scan", None,
+         "SELECT signature, degree, degree_reason, job_title, job_company FROM degree_cache WHERE education_hash=?",
+         ("education-current",)),
+        ("stale degree decisions", None,
+         "SELECT COUNT(*) FROM degree_cache WHERE education_hash != ?", ("education-current",))
+    ],
+    7: [
+        ("jobs to email",
+         "SELECT id FROM jobs WHERE state='written' AND emailed=0",
+         "SELECT id FROM jobs WHERE state='written' AND emailed=0", ()),
+        ("GUI processing list",
+         "SELECT * FROM processing ORDER BY id DESC",
+         "SELECT * FROM processing ORDER BY id DESC", ()),
+        ("next scraped job",
+         "SELECT id, url FROM jobs WHERE state='scraped' ORDER BY id ASC LIMIT 1",
+         "SELECT id, url FROM jobs WHERE state='scraped' ORDER BY id ASC LIMIT 1", ())
+    ],
+    8: [
+        ("next scraped job",
+         "SELECT id, url FROM jobs WHERE state='scraped' ORDER BY id ASC LIMIT 1",
+         "SELECT id, url FROM jobs WHERE state='scraped' ORDER BY id ASC LIMIT 1", ()),
+        ("jobs given up after failed writes", None,
+         "SELECT id, url, error FROM jobs WHERE state='unable_to_scrape' AND write_attempts > 0", ())
+    ],
+    9: [
+        ("GUI processing list",
+         "SELECT * FROM processing ORDER BY id DESC",
+         "SELECT * FROM processing ORDER BY id DESC", ())
+    ]
+}
+
+# Data a migration's queries need that the migration itself does not create.
+# :jobs is the --jobs count and :signature a MinHash signature of realistic size.
+AFTER_MIGRATION = {
+    2: "UPDATE jobs SET lease_owner='bench:1', lease_expires_at=datetime('now', '+90 seconds') WHERE state IN ('scraping', 'writing')",
+    # Three calls (judge, resume, cover letter) per job
+    5: """
+        WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < :jobs * 3)
+        INSERT INTO llm_usage (model, prompt_tokens, cached_tokens, completion_tokens)
+        SELECT CASE WHEN i % 3 = 0 THEN 'gpt-4o-mini' ELSE 'gpt-4o' END, 1800, 1024, 900 FROM n
+    """,
+    # One decision per job, a fifth of them made against an earlier education and not purged yet
+    6: """
+        WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < :jobs)
+        INSERT INTO degree_cache (description_hash, education_hash, signature, degree, degree_reason, job_title, job_company)
+        SELECT 'description-' || i, CASE WHEN i % 5 = 0 THEN 'education-old' ELSE 'education-current' END, :signature,
+               'Degree-Light', 'Reason', 'Engineer', 'Acme' FROM n
+    """
+}
+
+def seed(conn, jobs):
+    """Fill the legacy tables: mostly finished jobs, a few queued, in progress and failed. Resumes repeat, job_data does not."""
+    rng = random.Random(7)
+    description = "Lorem ipsum dolor sit amet. " * 80
+    job_data = lambda i: json.dumps({"title": f"Engineer {i}", "description": description})
+    resume = "Resume text. " * 200
+    conn.executescript(LEGACY_SCHEMA)
+    counts = {"processed": int(jobs * 0.9), "unable_to_scrape": int(jobs * 0.04), "processing": int(jobs * 0.04)}
+    counts["queue"] = jobs - sum(counts.values())
+    conn.executemany(
+        "INSERT INTO processed (url, job_title, status, emailed, resume, cover_letter, job_data) VALUES (?, 'Engineer', 'written', ?, ?, ?, ?)",
+        ((f"https://jobs.example.com/done/{i}", 0 if rng.random() < 0.01 else 1, resume, resume, job_data(i)) for i in range(counts["processed"]))
+    )
+    conn.executemany(
+        "INSERT INTO unable_to_scrape (url, error, job_data) VALUES (?, 'Blocked', ?)",
+        ((f"https://jobs.example.com/failed/{i}", job_data(i)) for i in range(counts["unable_to_scrape"]))
+    )
+    conn.executemany(
+        "INSERT INTO processing (url, status, job_data) VALUES (?, ?, ?)",
+        ((f"https://jobs.example.com/active/{i}", rng.choice(["scraping", "scraped", "writing"]), job_data(i)) for i in range(counts["processing"]))
+    )
+    conn.executemany(
+        "INSERT INTO queue (url) VALUES (?)",
+        ((f"https://jobs.example.com/new/{i}",) for i in range(counts["queue"]))
+    )
+    conn.commit()
+    return counts
+
+def payload_sizes(conn):
+    """Bytes of payload held inline in jobs rows and in the blob store."""
+    inline = conn.execute(
+        "SELECT SUM(COALESCE(LENGTH(job_data), 0) + COALESCE(LENGTH(resume), 0) + "
+        "COALESCE(LENGTH(cover_letter), 0) + COALESCE(LENGTH(feedback), 0)) FROM jobs"
+    ).fetchone()[0] or 0
+    has_blobs = conn.execute("SELECT 1 FROM sqlite_master WHERE name='blobs'").fetchone()
+    stored = conn.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM blobs").fetchone() if has_blobs else (0, 0)
+    return f"{inline / 1e6:.1f} MB inline in jobs, {stored[0]} blobs holding {stored[1] / 1e6:.1f} MB"
+
+def measure(conn, sql, params, repeat):
+    """(query plan, milliseconds per run) for sql, or (error message, None) if it cannot run yet."""
+    try:
+        plan = "; ".join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall())
+    except sqlite3.Error as e:
+        return f"n/a ({e})", None
+    start = time.perf_counter()
+    for _ in range(repeat):
+        conn.execute(sql, params).fetchall()
+    return plan or "(no query plan)", (time.perf_counter() - start) * 1000 / repeat
+
+def _tables(conn):
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'").fetchall()}
+
+def run(jobs, repeat):
+    path = os.path.join(tempfile.mkdtemp(prefix="cronjob-bench-"), "bench.db")
+    conn = sqlite3.connect(path)
+    counts = seed(conn, jobs)
+    print(f"Seeded {path}: " + ", ".join(f"{count} {table}" for table, count in counts.items()))
+    url = f"https://jobs.example.com/new/{max(counts['queue'] - 1, 0)}"
+    signature = json.dumps(random.Random(7).choices(range(1 << 61), k=64))
+
+    for version, description, _ in MIGRATIONS:
+        queries = BENCHMARKS.get(version, [])
+        before = {name: measure(conn, sql, (url, url) if params == "url" else params, repeat)
+                  for name, sql, _, params in queries if sql}
+        sizes_before = payload_sizes(conn) if version >= 1 and "jobs" in _tables(conn) else None
+        migrate(conn, target=version)
+        if version in AFTER_MIGRATION:
+            with conn:
+                conn.execute(AFTER_MIGRATION[version], {"jobs": jobs, "signature": signature})
+
+        print(f"\nMigration {version}: {description}")
+        sizes_after = payload_sizes(conn) if sizes_before else None
+        if sizes_before != sizes_after:
+            print(f"  payloads: {sizes_before} -> {sizes_after}")
+        for name, before_sql, after_sql, params in queries:
+            after = measure(conn, after_sql, (url,) if params == "url" else params, repeat)
+            print(f"  {name}")
+            for label, (plan, ms) in (("before", before.get(name, ("n/a (no such query yet)", None))), ("after", after)):
+                timing = f"{ms:8.3f} ms" if ms is not None else "       - ms"
+                print(f"    {label:<6} {timing}  {plan}")
+    conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Query plans before and after each database migration.")
+    parser.add_argument("--jobs", type=int, default=20000, help="Jobs to seed the benchmark database with")
+    parser.add_argument("--repeat", type=int, default=50, help="Runs per query for the timings")
+    args = parser.parse_args()
+    run(args.jobs, args.repeat)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+import re
+import json
+import time
+import uuid
+import argparse
+import threading
+from email import message_from_bytes
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local stand-in for the OpenAI Files + Batch endpoints, for trying the bulk writer
+# without spending money. Start it and point the app at it:
+#   python -m src.mock_batch_server --port 8765 --delay 10
+#   OPENAI_BASE_URL = http://127.0.0.1:8765/v1
+# Batches move validating -> in_progress -> completed over --delay seconds. Every
+# request gets a canned chat completion shaped like what the writer expects;
+# --fail-every N makes every Nth request fail so the retry path can be exercised.
+
+FILES = {}
+BATCHES = {}
+LOCK = threading.Lock()
+
+def canned_reply(custom_id):
+    """Plausible response text for each kind of writer request."""
+    if custom_id.startswith("judge-"):
+        return "Degree-Light\nMock reason: the posting does not ask for an advanced degree.\nMock Job Title\nMock Company"
+    if custom_id.startswith("resume-"):
+        return (
+            "555-0100 | mock@example.com | example.com | linkedin.com/in/mock<br/>\n"
+            "<h>Summary</h><br/>\nMock summary paragraph for the posting.<br/>\n"
+            "<h>Skills</h><br/>\n• Mock skill one<br/>\n• Mock skill two<br/>\n"
+            "<f>Mock feedback: the resume was generated by the local batch server.</f>"
+        )
+    return "January 01, 2025<br/>\nDear Hiring Manager,<br/>\nMock cover letter paragraph.<br/>\nSincerely,<br/>\nMock Name"
+
+def file_object(file_id):
+    entry = FILES[file_id]
+    return {
+        "id": file_id,
+        "object": "file",
+        "bytes": len(entry["content"]),
+        "created_at": entry["created_at"],
+        "filename": entry["filename"],
+        "purpose": entry["purpose"],
+        "status": "processed"
+    }
+
+def complete_batch(batch, fail_every):
+    """Run every request of the batch and write the output and error files."""
+    output_lines, error_lines = [], []
+    lines = [line for line in FILES[batch["input_file_id"]]["content"].decode("utf-8").splitlines() if line.strip()]
+    for index, line in enumerate(lines, start=1):
+        request = json.loads(line)
+        custom_id = request["custom_id"]
+        if fail_every and index % fail_every == 0:
+            error_lines.append(json.dumps({
+                "id": f"batch_req_{uuid.uuid4().hex}",
+                "custom_id": custom_id,
+                "response": {"status_code": 500, "request_id": uuid.uuid4().hex, "body": {"error": {"message": "Mock failure"}}},
+                "error": None
+            }))
+            continue
+        body = request["body"]
+        output_lines.append(json.dumps({
+            "id": f"batch_req_{uuid.uuid4().hex}",
+            "custom_id": custom_id,
+            "response": {
+                "status_code": 200,
+                "request_id": uuid.uuid4().hex,
+                "body": {
+                    "id": f"chatcmpl-{uuid.uuid4().hex}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "mock"),
+                    "choices": [{
+                        "index": 0,
+                        "finish_reason": "stop",
+                        "message": {"role": "assistant", "content": canned_reply(custom_id)}
+                    }],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+                }
+            },
+            "error": None
+        }))
+
+    batch["output_file_id"] = store_file("\n".join(output_lines).encode("utf-8"), "batch_output.jsonl", "batch_output")
+    if error_lines:
+        batch["error_file_id"] = store_file("\n".join(error_lines).encode("utf-8"), "batch_errors.jsonl", "batch_output")
+    batch["request_counts"] = {"total": len(lines), "completed": len(output_lines), "failed": len(error_lines)}
+    batch["status"] = "completed"
+    batch["completed_at"] = int(time.time())
+
+def store_file(content, filename, purpose):
+    file_id = f"file-{uuid.uuid4().hex}"
+    FILES[file_id] = {"content": content, "filename": filename, "purpose": purpose, "created_at": int(time.time())}
+    return file_id
+
+class MockBatchHandler(BaseHTTPRequestHandler):
+    delay = 10
+    fail_every = 0
+
+    def _send_json(self, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _body(self):
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def do_POST(self):
+        with LOCK:
+            if self.path == "/v1/files":
+                # multipart/form-data with 'purpose' and 'file' parts
+                message = message_from_bytes(
+                    f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode("utf-8") + self._body(),
+                    policy=HTTP
+                )
+                fields = {}
+                for part in message.iter_parts():
+                    name = part.get_param("name", header="content-disposition")
+                    fields[name] = (part.get_filename(), part.get_payload(decode=True))
+                filename, content = fields["file"]
+                file_id = store_file(content, filename or "upload.jsonl", fields["purpose"][1].decode("utf-8"))
+                return self._send_json(200, file_object(file_id))
+
+            if self.path == "/v1/batches":
+                payload = json.loads(self._body() or b"{}")
+                if payload.get("input_file_id") not in FILES:
+                    return self._send_json(400, {"error": {"message": "Unknown input_file_id"}})
+                batch_id = f"batch_{uuid.uuid4().hex}"
+                BATCHES[batch_id] = {
+                    "id": batch_id,
+                    "object": "batch",
+                    "endpoint": payload.get("endpoint"),
+                    "input_file_id": payload["input_file_id"],
+                    "completion_window": payload.get("completion_window", "24h"),
+                    "status": "validating",
+                    "output_file_id": None,
+                    "error_file_id": None,
+                    "created_at": int(time.time()),
+                    "completed_at": None,
+                    "request_counts": {"total": 0, "completed": 0, "failed": 0},
+                    "metadata": payload.get("metadata")
+                }
+                return self._send_json(200, BATCHES[batch_id])
+
+            match = re.fullmatch(r"/v1/batches/([^/]+)/cancel", self.path)
+            if match and match.group(1) in BATCHES:
+                BATCHES[match.group(1)]["status"] = "cancelled"
+                return self._send_json(200, BATCHES[match.group(1)])
+        self._send_json(404, {"error": {"message": f"No route for POST {self.path}"}})
+
+    def do_GET(self):
+        with LOCK:
+            match = re.fullmatch(r"/v1/batches/([^/]+)", self.path)
+            if match and match.group(1) in BATCHES:
+                batch = BATCHES[match.group(1)]
+                elapsed = time.time() - batch["created_at"]
+                if batch["status"] == "validating" and elapsed >= self.delay / 2:
+                    batch["status"] = "in_progress"
+                if batch["status"] == "in_progress" and elapsed >= self.delay:
+                    complete_batch(batch, self.fail_every)
+                return self._send_json(200, batch)
+
+            match = re.fullmatch(r"/v1/files/([^/]+)/content", self.path)
+            if match and match.group(1) in FILES:
+                content = FILES[match.group(1)]["content"]
+                self.send_response(200)
+                self.send_header("Content-Type", "application/jsonl")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+                return
+
+            match = re.fullmatch(r"/v1/files/([^/]+)", self.path)
+            if match and match.group(1) in FILES:
+                return self._send_json(200, file_object(match.group(1)))
+        self._send_json(404, {"error": {"message": f"No route for GET {self.path}"}})
+
+    def log_message(self, format, *args):
+        print(f"[mock-batch] {format % args}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock OpenAI Batch API server for the bulk writer.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=10, help="Seconds until a batch completes")
+    parser.add_argument("--fail-every", type=int, default=0, help="Fail every Nth request (0 = never)")
+    args = parser.parse_args()
+
+    MockBatchHandler.delay = args.delay
+    MockBatchHandler.fail_every = args.fail_every
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), MockBatchHandler)
+    print(f"Mock batch server on http://127.0.0.1:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+import re
+import random
+import asyncio
+import logging
+from io import BytesIO
+from functools import partial
+from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from reportlab.lib.pagesizes import LETTER
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.enums import TA_LEFT, TA_CENTER
+from reportlab.pdfgen.canvas import Canvas
+from reportlab.pdfbase.pdfdoc import PDFInfo, PDFDictionary, PDFString, PDFName
+from src.settings import config
+
+# PDF rendering service. ReportLab layout is CPU-bound and holds the GIL, so
+# render_pdf() runs create_pdf_reportlab in a pool of worker processes: resumes and
+# cover letters of several jobs render on separate cores while the event loop keeps
+# scraping. Everything a worker needs (markup or layout blocks, style parameters,
+# output path) is passed in. Workers import this module and ReportLab, plus, under the
+# spawn start method (Windows), the __main__ script again as __mp_main__; main.py
+# therefore only imports the pipeline (cronjob.py) under its __main__ guard.
+
+_pool = None
+
+def get_pdf_pool():
+    """Return the shared process pool, or None when PDF_WORKERS is 0 (render in a thread instead)."""
+    global _pool
+    workers = int(config("PDF_WORKERS"))
+    if workers <= 0:
+        return None
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=workers)
+    return _pool
+
+def close_pdf_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+
+async def render_pdf(markup, pdf_path=None, **style):
+    """Render markup (text or layout blocks) with create_pdf_reportlab's style parameters off the event loop."""
+    global _pool
+    job = partial(create_pdf_reportlab, markup, pdf_path, **style)
+    pool = get_pdf_pool()
+    if pool is None:
+        return await asyncio.to_thread(job)
+    try:
+        return await asyncio.get_running_loop().run_in_executor(pool, job)
+    except BrokenProcessPool:
+        # A worker died (killed, out of memory); start a fresh pool next time and render this one here
+        logging.warning("PDF worker pool broke, rendering in a thread.")
+        _pool = None
+        return await asyncio.to_thread(job)
+
+class MarkupLayout:
+    """
+    Turns the model's ReportLab-flavoured markup into layout blocks one line at a time, so a
+    streamed response is laid out while it is still arriving. Blocks are plain tuples:
+    ("spacer",), ("heading", text), ("bullet", text), ("contact", text), ("body", text).
+    Layout stops at the <f> feedback tag.
+    """
+    def __init__(self):
+        self.blocks = []
+        self._pending = ""
+        self._started = False
+        self._first_line_found = False
+        self._stopped = False
+
+    def feed(self, text):
+        self._pending += text
+        while "\n" in self._pending:
+            line, self._pending = self._pending.split("\n", 1)
+            self._add_line(line)
+
+    def finish(self):
+        """Lay out the last (unterminated) line and return the blocks."""
+        if self._pending:
+            self._add_line(self._pending)
+            self._pending = ""
+        # Same as stripping the text: no trailing blank lines
+        while self.blocks and self.blocks[-1] == ("spacer",):
+            self.blocks.pop()
+        return self.blocks
+
+    def _add_line(self, ln):
+        if self._stopped:
+            return
+        if "<f>" in ln:
+            ln = ln.split("<f>", 1)[0]
+            self._stopped = True
+
+        # Remove triple backticks **markdown** [brackets] and rogue formatting inclusions
+        ln = re.sub(r"```+", "", ln)
+        ln = re.sub(r"\*\*(.*?)\*\*", r"\1", ln)
+        ln = re.sub(r"\[(.*?)\]", r"\1", ln)
+        ln = re.sub(r"\b(plaintext|xml|markup|markdown)\b", "", ln, flags=re.IGNORECASE)
+
+        line = ln.strip()
+        if not line:
+            # Same as stripping the text: no leading blank lines
+            if self._started:
+                self.blocks.append(("spacer",))
+            return
+        self._started = True
+
+        # If line has <h> => heading
+        if "<h>" in line:
+            heading_content = re.sub(r"<h>(.*?)</h>", r"\1", line)
+            self.blocks.append(("heading", heading_content.upper()))
+            return
+
+        # bullet lines
+        if line.startswith("• "):
+            self.blocks.append(("bullet", f"• {line[2:].strip()}"))
+            return
+
+        # center the first non-empty line after doc title => contact info
+        if not self._first_line_found:
+            self.blocks.append(("contact", line))
+            self._first_line_found = True
+            return
+
+        # <br/> => split into separate paragraphs
+        for c in line.split("<br/>"):
+            c = c.strip()
+            self.blocks.append(("body", c) if c else ("spacer",))
+
+def parse_markup(markup_text):
+    """Layout blocks for a complete markup text."""
+    layout = MarkupLayout()
+    layout.feed(markup_text)
+    return layout.finish()
+
+def create_pdf_reportlab(markup, pdf_path=None, doc_title="Document", author="",
+                         leftMargin=inch, rightMargin=inch,
+                         topMargin=inch, bottomMargin=inch, job_title="", creation_time_range=(2*24*60, 14*24*60)):
+    """
+    - We have two doc types: resume vs cover letter. 
+    - If doc_title has "Cover Letter", we do 10pt. Else 9pt for resume.
+    - Headings (<h>...</h>) => bigger font (12).
+    - markup is either the markup text or its blocks from MarkupLayout / parse_markup.
+    - Center the first non-empty line after the doc title, i.e. contact info.
+    - Metadata is set at build time and the PDF is rendered in memory and written once.
+    Writes pdf_path and returns it, or returns the PDF bytes when no path is given.
+    """
+    blocks = parse_markup(markup) if isinstance(markup, str) else markup
+    creation_date, mod_date = spoofed_pdf_dates(creation_time_range)
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(
+        buffer, pagesize=LETTER, title=doc_title,
+        author=author,
+        subject=f"{author} {job_title}",
+        keywords=f"{job_title}, {author}",
+        creator="Microsoft Word",
+        producer="Acrobat PDFMaker 21.0 for Word",
+        leftMargin=leftMargin, rightMargin=rightMargin,
+        topMargin=topMargin, bottomMargin=bottomMargin
+    )
+    styles = getSampleStyleSheet()
+    # if it's a cover letter => 11pt, else => 8pt
+    base_font_size = 11 if "Cover Letter" in doc_title else 8
+
+    docTitleStyle = ParagraphStyle(
+        'DocTitleStyle',
+        fontName='Helvetica-Bold',
+        fontSize=12,
+        leading=2,
+        alignment=TA_CENTER
+    )
+    heading_style = ParagraphStyle(
+        'HeadingStyle',
+        parent=styles['Normal'],
+        fontName='Helvetica-Bold',
+        fontSize=10,
+        leading=20,
+        alignment=TA_LEFT
+    )
+    body_style = ParagraphStyle(
+        'BodyStyle',
+        parent=styles['Normal'],
+        fontName='Helvetica',
+        fontSize=base_font_size,
+        leading=base_font_size+2,
+        alignment=TA_LEFT
+    )
+    contact_style = ParagraphStyle(
+        'CenterFirstLine',
+        parent=body_style,
+        alignment=TA_CENTER,
+        fontSize=base_font_size,
+        leading=base_font_size+2,
+    )
+    styles_by_kind = {"heading": heading_style, "bullet": body_style, "contact": contact_style, "body": body_style}
+
+    story = [
+        Paragraph(doc_title, docTitleStyle),
+        Spacer(1, 0.2*inch)
+    ]
+    for kind, *text in blocks:
+        if kind == "spacer":
+            story.append(Spacer(1, 0.1 * inch))
+        else:
+            story.append(Paragraph(text[0], styles_by_kind[kind]))
+
+    doc.build(story, canvasmaker=partial(DatedCanvas, creation_date=creation_date, mod_date=mod_date))
+    pdf_bytes = buffer.getvalue()
+    if not pdf_path:
+        return pdf_bytes
+    with open(pdf_path, "wb") as pdf_file:
+        pdf_file.write(pdf_bytes)
+
+    print(f"{doc_title} PDF created: {pdf_path}", flush=True)
+    return pdf_path
+
+def spoofed_pdf_dates(creation_time_range):
+    """A random creation date within creation_time_range minutes ago, modified 2-30 minutes later (never in the future)."""
+    random_minutes_ago = random.randint(*creation_time_range)
+    creation_date = datetime.now() - timedelta(minutes=random_minutes_ago)
+    mod_date = min(datetime.now(), creation_date + timedelta(minutes=random.randint(2, 30)))
+    return creation_date, mod_date
+
+class DatedPDFInfo(PDFInfo):
+    """Document info with its own CreationDate and ModDate (ReportLab writes the build time for both)."""
+    def __init__(self, creation_date, mod_date):
+        super().__init__()
+        self.creation_date = creation_date
+        self.mod_date = mod_date
+
+    def format(self, document):
+        return PDFDictionary({
+            "Title": PDFString(self.title),
+            "Author": PDFString(self.author),
+            "CreationDate": PDFString(self.creation_date.strftime("D:%Y%m%d%H%M%S")),
+            "ModDate": PDFString(self.mod_date.strftime("D:%Y%m%d%H%M%S")),
+            "Producer": PDFString(self.producer),
+            "Creator": PDFString(self.creator),
+            "Subject": PDFString(self.subject),
+            "Keywords": PDFString(self.keywords),
+            "Trapped": PDFName(self.trapped)
+        }).format(document)
+
+class DatedCanvas(Canvas):
+    """Canvas whose document info carries the given dates; the doc template fills in the other fields."""
+    def __init__(self, *args, creation_date, mod_date, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._doc.info = DatedPDFInfo(creation_date, mod_date)
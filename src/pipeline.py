@@ -0,0 +1,187 @@
+import asyncio
+import logging
+from src.input import process_jobs as ingest_jobs
+from src.scraper import claim_next_job, scrape_job
+from src.writer import (
+    load_user_data, claim_next_writing_job, release_writing_job, fail_writing_job,
+    reset_interrupted_writing_jobs, write_job, MAX_WRITE_ATTEMPTS
+)
+from src.batch_writer import bulk_write_loop
+from src.emailer import check_and_send_emails
+from src.settings import config
+from src.llm import wait_until_available, CircuitOpenError
+from src.browser_pool import close_browser_pool
+from src.pdf_service import close_pdf_pool
+from src.jobs import keep_leases
+from src.events import bus, PollBackoff, start_trigger_listener, IDLE_RECHECK_SECONDS
+
+# Pipeline mode: ingest -> scrape -> write -> email run as independent asyncio
+# workers connected by bounded queues, so a slow OpenAI call never blocks scraping.
+
+# A job whose writing fails is retried after WRITE_RETRY_DELAY seconds (doubling each time),
+# until writer.fail_writing_job gives up on it after MAX_WRITE_ATTEMPTS failures.
+WRITE_RETRY_DELAY = 30
+
+async def ingest_worker(scrape_queue, free_scrapers):
+    """Pull Gist URLs into the queue table and feed claimed jobs to the scrape stage."""
+    gist_backoff = PollBackoff(int(config("GIST_POLL_MIN")), int(config("GIST_POLL_MAX")))
+    next_gist_poll = 0
+    loop = asyncio.get_running_loop()
+
+    while True:
+        gist_enabled = bool(int(config("GIST_INPUT")))
+        if gist_enabled and loop.time() >= next_gist_poll:
+            try:
+                new_jobs = await asyncio.to_thread(ingest_jobs)
+            except Exception as e:
+                logging.error(f"Ingest failed: {e}")
+                new_jobs = 0
+            next_gist_poll = loop.time() + gist_backoff.update(new_jobs > 0)
+
+        # A job is only claimed once a scrape worker is free to take it, so queued
+        # jobs stay 'pending' (and free for another process) instead of waiting
+        # leased in memory.
+        while True:
+            await free_scrapers.acquire()
+            job_url = claim_next_job()
+            if not job_url:
+                free_scrapers.release()
+                break
+            scrape_queue.put_nowait(job_url)
+
+        # Sleep until a trigger arrives (GUI submit, insert_into_queue) or the Gist is due
+        timeout = max(next_gist_poll - loop.time(), 0) if gist_enabled else IDLE_RECHECK_SECONDS
+        await bus.wait("queue", timeout)
+
+async def scrape_worker(name, scrape_queue, write_queue, free_scrapers):
+    """Scrape claimed jobs and hand successful ones to the write stage."""
+    while True:
+        job_url = await scrape_queue.get()
+        try:
+            if await scrape_job(job_url):
+                logging.info(f"[{name}] Scraped {job_url}")
+                # In bulk mode the Batch API writer collects scraped jobs from the table itself
+                if write_queue is not None:
+                    await write_queue.put(job_url)
+        except Exception as e:
+            logging.error(f"[{name}] Scrape failed for {job_url}: {e}")
+        finally:
+            scrape_queue.task_done()
+            free_scrapers.release()
+
+async def requeue_when_available(write_queue, job_url):
+    """Hand a job back to the write stage once the OpenAI circuit breaker closes."""
+    await wait_until_available()
+    await write_queue.put(job_url)
+
+async def requeue_after(write_queue, job_url, delay):
+    """Hand a job whose writing failed back to the write stage after delay seconds."""
+    await asyncio.sleep(delay)
+    await write_queue.put(job_url)
+
+async def write_worker(name, write_queue, email_queue):
+    """Generate resume & cover letter for scraped jobs."""
+    while True:
+        job_url = await write_queue.get()
+        row = None
+        try:
+            # Only this stage waits out an open circuit breaker; scrape and email keep going
+            await wait_until_available()
+            user_data = load_user_data()
+            if not user_data:
+                logging.warning(f"[{name}] No user data loaded, leaving {job_url} for the next run.")
+                continue
+            row = claim_next_writing_job(job_url)
+            if not row:
+                continue
+            if await write_job(row, user_data):
+                logging.info(f"[{name}] Wrote job id={row[0]}")
+                await email_queue.put(row[0])
+        except CircuitOpenError as e:
+            logging.warning(f"[{name}] Writing paused for {job_url}: {e}")
+            release_writing_job(row[0])
+            # Requeue from a separate task so a full write queue cannot block this worker
+            asyncio.create_task(requeue_when_available(write_queue, job_url))
+        except Exception as e:
+            logging.error(f"[{name}] Writing failed for {job_url}: {e}")
+            attempts = fail_writing_job(row[0], e) if row else None
+            if attempts is not None and attempts < MAX_WRITE_ATTEMPTS:
+                # From a separate task so the delay and a full write queue cannot block this worker
+                asyncio.create_task(requeue_after(write_queue, job_url, WRITE_RETRY_DELAY * 2 ** (attempts - 1)))
+            elif attempts is not None:
+                logging.error(f"[{name}] Gave up on {job_url} after {attempts} failed writes.")
+        finally:
+            write_queue.task_done()
+
+async def email_worker(email_queue):
+    """Send emails for processed jobs whenever the write stage finishes one."""
+    while True:
+        await email_queue.get()
+        # check_and_send_emails sends every pending row, so collapse queued wakeups into one pass
+        while not email_queue.empty():
+            email_queue.get_nowait()
+            email_queue.task_done()
+        try:
+            await asyncio.to_thread(check_and_send_emails)
+        except Exception as e:
+            logging.error(f"Email sending failed: {e}")
+        finally:
+            email_queue.task_done()
+
+async def requeue_scraped_jobs(write_queue):
+    """Feed jobs scraped (or interrupted mid-write) by a previous run to the write stage."""
+    for job_url in reset_interrupted_writing_jobs():
+        await write_queue.put(job_url)
+
+async def requeue_reclaimed_jobs(write_queue, reclaimed):
+    """Hand jobs reclaimed from a dead worker back to the write stage; reclaimed scrapes go through ingest."""
+    for job_id, job_url, state in reclaimed:
+        if state == "scraped":
+            # From a separate task so a full write queue cannot hold up lease renewal
+            asyncio.create_task(write_queue.put(job_url))
+
+async def run_pipeline():
+    """Start every stage worker and run until cancelled."""
+    queue_size = int(config("PIPELINE_QUEUE_SIZE"))
+    scrape_workers = int(config("SCRAPE_WORKERS"))
+    write_workers = int(config("WRITE_WORKERS"))
+    bulk_writer = bool(int(config("BULK_WRITER")))
+
+    # Holds at most one claimed job per scrape worker (see ingest_worker)
+    scrape_queue = asyncio.Queue()
+    free_scrapers = asyncio.Semaphore(scrape_workers)
+    write_queue = None if bulk_writer else asyncio.Queue(maxsize=queue_size)
+    email_queue = asyncio.Queue()
+
+    writer_description = "bulk Batch API writer" if bulk_writer else f"{write_workers} write worker(s)"
+    logging.info(f"Pipeline mode: {scrape_workers} scrape worker(s), {writer_description}, queue size {queue_size}.")
+    print(f"Pipeline mode: {scrape_workers} scrape worker(s), {writer_description}.")
+
+    trigger_listener = await start_trigger_listener()
+
+    on_reclaimed = None if bulk_writer else (lambda reclaimed: requeue_reclaimed_jobs(write_queue, reclaimed))
+    tasks = [
+        asyncio.create_task(ingest_worker(scrape_queue, free_scrapers)),
+        asyncio.create_task(email_worker(email_queue)),
+        asyncio.create_task(keep_leases(on_reclaimed)),
+    ]
+    tasks += [asyncio.create_task(scrape_worker(f"scrape-{i + 1}", scrape_queue, write_queue, free_scrapers)) for i in range(scrape_workers)]
+    if bulk_writer:
+        reset_interrupted_writing_jobs()
+        tasks.append(asyncio.create_task(bulk_write_loop(email_queue)))
+    else:
+        tasks.append(asyncio.create_task(requeue_scraped_jobs(write_queue)))
+        tasks += [asyncio.create_task(write_worker(f"write-{i + 1}", write_queue, email_queue)) for i in range(write_workers)]
+
+    # Send anything processed but not yet emailed by a previous run
+    email_queue.put_nowait(None)
+
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        if trigger_listener:
+            trigger_listener.close()
+        await close_browser_pool()
+        close_pdf_pool()
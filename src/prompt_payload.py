@@ -0,0 +1,123 @@
+import re
+import json
+import logging
+from src.settings import config
+from src.llm import estimate_tokens
+
+# Builds the job and user JSON embedded in the writer prompts. Compared to dumping
+# job_data with indent=2 this drops what the model does not need (form fields,
+# scrape metrics, empty values), trims boilerplate sections from the description,
+# serializes without whitespace and keeps the job part under a token budget.
+
+DROP_JOB_KEYS = {"form_fields", "metrics", "extractor"}
+
+# Headings of description sections that never help write a resume or cover letter.
+# Legal, privacy and compliance jobs use the same words in their titles and duties, so a
+# line only starts a dropped section when it stands alone and is exactly one of these
+# headings, or starts with one and ends with ":" (e.g. "Pay Transparency Notice:").
+DROP_SECTION_HEADINGS = {
+    "equal opportunity", "equal opportunity employer", "equal employment opportunity", "eeo", "eeo statement",
+    "e-verify", "reasonable accommodation", "reasonable accommodations", "accommodations",
+    "privacy notice", "privacy policy", "privacy statement", "applicant privacy notice", "candidate privacy notice",
+    "pay transparency", "pay transparency notice", "know your rights", "fraud alert", "recruitment fraud",
+    "recruitment fraud alert", "recruiting fraud", "notice to agencies", "notice to recruiters", "disclaimer",
+    "cookies", "cookie policy", "similar jobs", "related jobs", "more jobs", "share this job", "follow us"
+}
+DROP_SECTION_PREFIX = re.compile(
+    "^(" + "|".join(re.escape(heading) for heading in sorted(DROP_SECTION_HEADINGS, key=len, reverse=True)) + r")\b"
+)
+# A stand-alone EEO statement paragraph without a heading of its own
+EEO_STATEMENT_PATTERN = re.compile(r"\bis an equal (employment )?opportunity( and affirmative action)? employer\b", re.IGNORECASE)
+BOILERPLATE_LINES = {
+    "apply", "apply now", "apply for this job", "save", "save job", "share", "sign in", "log in",
+    "back to jobs", "back to search", "read more", "show more", "show less", "accept", "accept all",
+    "accept all cookies", "reject all", "manage cookies", "skip to main content", "easy apply"
+}
+HEADING_MAX_LENGTH = 60
+# Stop dropping after this many lines in case a section heading was misdetected
+MAX_DROPPED_SECTION_LINES = 10
+# Lines of the first paragraph kept as-is (pages scraped without blank lines are one long "paragraph")
+FIRST_PARAGRAPH_MAX_LINES = 5
+
+def clean_data(data):
+    """Remove empty fields to reduce token usage."""
+    if isinstance(data, dict):
+        return {k: clean_data(v) for k, v in data.items() if v and v != "unknown"}
+    elif isinstance(data, list):
+        return [clean_data(v) for v in data if v and v != "unknown"]
+    return data
+
+def compact_json(data):
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+def _is_heading(line):
+    return len(line) <= HEADING_MAX_LENGTH and not line.endswith((".", ",", ";"))
+
+def _is_drop_heading(line):
+    """Whether a stand-alone heading line starts a legal/EEO/site section to drop."""
+    heading = line.lower().rstrip(":").strip()
+    return heading in DROP_SECTION_HEADINGS or (line.endswith(":") and DROP_SECTION_PREFIX.match(heading) is not None)
+
+def trim_description(description, title=None):
+    """
+    Drop boilerplate lines, repeated lines and legal/EEO sections (up to the next heading).
+    The first paragraph (usually the title and overview) and lines repeating the job title are always kept.
+    """
+    kept = []
+    seen = set()
+    title = " ".join((title or "").split()).lower()
+    in_first_paragraph = True
+    dropped_lines = None  # lines dropped so far in the current section, None when keeping
+    for line in description.splitlines():
+        line = " ".join(line.split())
+        if not line:
+            in_first_paragraph = in_first_paragraph and not kept
+            continue
+        in_first_paragraph = in_first_paragraph and len(kept) < FIRST_PARAGRAPH_MAX_LINES
+        if in_first_paragraph or (title and line.lower() == title):
+            if line not in seen:
+                seen.add(line)
+                kept.append(line)
+            continue
+        if line.lower().strip(":") in BOILERPLATE_LINES:
+            continue
+        if _is_heading(line):
+            dropped_lines = 0 if _is_drop_heading(line) else None
+        elif EEO_STATEMENT_PATTERN.search(line):
+            continue
+        if dropped_lines is not None and dropped_lines < MAX_DROPPED_SECTION_LINES:
+            dropped_lines += 1
+            continue
+        if line in seen:
+            continue
+        seen.add(line)
+        kept.append(line)
+    return "\n".join(kept)
+
+def _fit_description(data, budget, model):
+    """Shorten the description (from the end, on line boundaries) until the payload fits the budget."""
+    payload = compact_json(data)
+    tokens = estimate_tokens(payload, model)
+    while tokens > budget and data.get("description"):
+        description = data["description"]
+        keep_chars = int(len(description) * (budget / tokens) * 0.95)
+        cut = description.rfind("\n", 0, keep_chars)
+        data["description"] = description[:cut if cut > 0 else keep_chars].rstrip()
+        payload = compact_json(data)
+        tokens = estimate_tokens(payload, model)
+    return payload, tokens
+
+def build_job_payload(job_data, model=None):
+    """Compact job JSON for the prompts. Logs how many tokens it saves over the full indented dump."""
+    original_tokens = estimate_tokens(json.dumps(job_data, indent=2), model)
+    data = clean_data({key: value for key, value in job_data.items() if key not in DROP_JOB_KEYS})
+    if data.get("description"):
+        data["description"] = trim_description(data["description"], data.get("title"))
+
+    payload, tokens = _fit_description(data, int(config("JOB_PROMPT_TOKEN_BUDGET")), model)
+    logging.info(f"Job prompt payload: {original_tokens} -> {tokens} tokens ({original_tokens - tokens} saved per prompt)")
+    return payload
+
+def build_user_payload(user_data, *exclude):
+    """Compact user profile JSON without empty values or the excluded top-level keys."""
+    return compact_json(clean_data({key: value for key, value in user_data.items() if key not in exclude}))
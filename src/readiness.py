@@ -0,0 +1,89 @@
+import json
+import time
+import logging
+from urllib.parse import urlparse
+from src.settings import config
+
+# Per-site readiness profiles, matched by the end of the hostname.
+# A page is ready once any selector has text, or the body has at least min_text characters.
+# Extra or overriding profiles can be given as JSON in the READINESS_PROFILES setting, e.g.
+# {"example.com": {"selectors": ["#job-body"], "min_text": 800}}
+SITE_PROFILES = {
+    "indeed.com": {"selectors": ["#jobDescriptionText"]},
+    "myworkdayjobs.com": {"selectors": ["[data-automation-id='jobPostingDescription']", "section[data-automation-id='jobDescription']"]},
+    "greenhouse.io": {"selectors": ["#content", ".job__description", "#app_body"]},
+    "lever.co": {"selectors": ["[data-qa='job-description']", ".section-wrapper.page-full-width"]},
+    "ashbyhq.com": {"selectors": ["[class*='_descriptionText']", "#overview"]},
+    "icims.com": {"selectors": [".iCIMS_JobContent", ".iCIMS_InfoMsg_Job"]},
+    "hiring.cafe": {"selectors": ["article", "main"]},
+}
+DEFAULT_MIN_TEXT = 1000
+
+READY_SCRIPT = """
+({selectors, minText}) => {
+    for (const selector of selectors) {
+        const element = document.querySelector(selector);
+        if (element && (element.innerText || "").trim().length > 0) return true;
+    }
+    return !!document.body && document.body.innerText.length >= minText;
+}
+"""
+
+TEXT_GROWN_SCRIPT = "(before) => !!document.body && document.body.innerText.length > before"
+
+def get_profile(url, default_selectors):
+    """Return (name, profile) for url; unknown sites wait on the generic description selectors."""
+    host = (urlparse(url).hostname or "").lower()
+
+    profiles = dict(SITE_PROFILES)
+    try:
+        profiles.update(json.loads(config("READINESS_PROFILES") or "{}"))
+    except (TypeError, ValueError) as e:
+        logging.warning(f"Ignoring invalid READINESS_PROFILES setting: {e}")
+
+    for domain, profile in profiles.items():
+        if host == domain or host.endswith("." + domain):
+            return domain, {
+                "selectors": profile.get("selectors", default_selectors),
+                "min_text": profile.get("min_text", DEFAULT_MIN_TEXT)
+            }
+    return "default", {"selectors": default_selectors, "min_text": DEFAULT_MIN_TEXT}
+
+async def load_until_ready(page, url, default_selectors):
+    """
+    Navigate to url and wait for the job content instead of network idle.
+    Returns readiness metrics; raises only if navigation itself fails.
+    """
+    profile_name, profile = get_profile(url, default_selectors)
+    ready_timeout = float(config("PAGE_READY_TIMEOUT")) * 1000
+
+    started = time.perf_counter()
+    await page.goto(url, wait_until="domcontentloaded", timeout=30000)
+    loaded_ms = (time.perf_counter() - started) * 1000
+
+    ready = True
+    try:
+        await page.wait_for_function(READY_SCRIPT, arg={
+            "selectors": profile["selectors"],
+            "minText": profile["min_text"]
+        }, timeout=ready_timeout)
+    except Exception:
+        # Not fatal: extract whatever rendered and let the content check decide
+        ready = False
+
+    metrics = {
+        "profile": profile_name,
+        "ready": ready,
+        "dom_loaded_ms": round(loaded_ms),
+        "time_to_ready_ms": round((time.perf_counter() - started) * 1000)
+    }
+    logging.info(f"Page readiness for {url}: {metrics}")
+    return metrics
+
+async def wait_for_text_growth(page, before_length, timeout=2000):
+    """After expanding content (e.g. 'Read More'), wait until the body text grows, up to timeout ms."""
+    try:
+        await page.wait_for_function(TEXT_GROWN_SCRIPT, arg=before_length, timeout=timeout)
+        return True
+    except Exception:
+        return False
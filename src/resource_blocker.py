@@ -0,0 +1,92 @@
+import logging
+from collections import Counter
+from urllib.parse import urlparse
+from src.settings import config
+
+# Rough transfer sizes used to estimate what a blocked request would have cost.
+# Blocked requests are never downloaded, so savings can only be estimated.
+TYPICAL_BYTES = {
+    "image": 60_000,
+    "media": 500_000,
+    "font": 35_000,
+    "stylesheet": 20_000,
+    "script": 40_000,
+    "xhr": 5_000,
+    "fetch": 5_000,
+}
+DEFAULT_TYPICAL_BYTES = 10_000
+
+def _split_setting(key):
+    return [item.strip().lower() for item in (config(key) or "").split(",") if item.strip()]
+
+def _domain_matches(host, domains):
+    return any(host == domain or host.endswith("." + domain) for domain in domains)
+
+class ResourceBlocker:
+    """Aborts requests on one page by resource type or domain and tallies what was skipped."""
+    def __init__(self, block_types, block_domains, allow_domains):
+        self.block_types = set(block_types)
+        self.block_domains = block_domains
+        self.allow_domains = allow_domains
+        self.blocked = Counter()
+        self.allowed_requests = 0
+        self.allowed_bytes = 0
+
+    async def attach(self, page):
+        await page.route("**/*", self._handle_route)
+        page.on("response", self._count_response)
+
+    def should_block(self, url, resource_type):
+        host = (urlparse(url).hostname or "").lower()
+        if _domain_matches(host, self.allow_domains):
+            return False
+        return resource_type in self.block_types or _domain_matches(host, self.block_domains)
+
+    async def _handle_route(self, route):
+        request = route.request
+        if self.should_block(request.url, request.resource_type):
+            self.blocked[request.resource_type] += 1
+            await route.abort()
+        else:
+            self.allowed_requests += 1
+            await route.continue_()
+
+    def _count_response(self, response):
+        length = response.headers.get("content-length")
+        if length and length.isdigit():
+            self.allowed_bytes += int(length)
+
+    def report(self, load_ms):
+        """
+        Summarize one scrape. Time saved is estimated from the bytes saved at the
+        throughput this page actually achieved for the requests that were allowed.
+        """
+        est_bytes_saved = sum(TYPICAL_BYTES.get(kind, DEFAULT_TYPICAL_BYTES) * count for kind, count in self.blocked.items())
+        est_ms_saved = 0
+        if self.allowed_bytes and load_ms:
+            bytes_per_ms = self.allowed_bytes / load_ms
+            est_ms_saved = round(est_bytes_saved / bytes_per_ms)
+        return {
+            "blocked_requests": sum(self.blocked.values()),
+            "blocked_by_type": dict(self.blocked),
+            "allowed_requests": self.allowed_requests,
+            "allowed_bytes": self.allowed_bytes,
+            "est_bytes_saved": est_bytes_saved,
+            "est_load_ms_saved": est_ms_saved
+        }
+
+def create_resource_blocker():
+    """Build a blocker from settings, or None when RESOURCE_BLOCKING is off."""
+    if not bool(int(config("RESOURCE_BLOCKING"))):
+        return None
+    return ResourceBlocker(
+        _split_setting("BLOCK_RESOURCE_TYPES"),
+        _split_setting("BLOCK_DOMAINS"),
+        _split_setting("ALLOW_DOMAINS")
+    )
+
+def log_blocking_report(url, report):
+    logging.info(
+        f"Blocked {report['blocked_requests']} requests on {url} "
+        f"(~{report['est_bytes_saved'] // 1024} KB, ~{report['est_load_ms_saved']} ms saved)"
+    )
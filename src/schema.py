@@ -0,0 +1,322 @@
+from src.jobs import STATES
+from src import blob_store
+from src.blob_store import BLOB_COLUMNS
+
+# Database schema shared by the pipeline (cronjob.py) and the GUI. Jobs live in a
+# single jobs table (see jobs.py for the state machine); queue, processing,
+# processed and unable_to_scrape are read-only views over it, so the GUI and any
+# ad-hoc queries keep working with the old table names.
+#
+# The schema is built by the ordered MIGRATIONS below. PRAGMA user_version holds
+# the last one applied, so each runs exactly once per database; add new changes
+# as a new migration at the end, never by editing an applied one. Run
+#   python -m src.migration_benchmark
+# to see the query plans of the hot queries before and after each migration.
+
+JOBS_TABLE = f"""
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT UNIQUE NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending' CHECK (state IN ({", ".join(f"'{state}'" for state in STATES)})),
+    added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP,
+    job_title TEXT,
+    job_company TEXT,
+    degree TEXT,
+    degree_reason TEXT,
+    feedback TEXT,
+    resume TEXT,
+    resume_pdf TEXT,
+    cover_letter TEXT,
+    cover_letter_pdf TEXT,
+    error TEXT,
+    submission_status TEXT,
+    emailed BOOLEAN DEFAULT FALSE,
+    job_data JSON
+)
+"""
+
+JOBS_SCHEMA = [
+    JOBS_TABLE,
+    "CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, id)",
+    """
+    CREATE TABLE IF NOT EXISTS job_transitions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        job_id INTEGER NOT NULL,
+        from_state TEXT,
+        to_state TEXT NOT NULL,
+        changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS job_transitions_job ON job_transitions (job_id, id)",
+    """
+    CREATE TRIGGER IF NOT EXISTS jobs_log_insert AFTER INSERT ON jobs
+    BEGIN
+        INSERT INTO job_transitions (job_id, from_state, to_state) VALUES (NEW.id, NULL, NEW.state);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS jobs_log_transition AFTER UPDATE OF state ON jobs
+    WHEN OLD.state != NEW.state
+    BEGIN
+        INSERT INTO job_transitions (job_id, from_state, to_state) VALUES (NEW.id, OLD.state, NEW.state);
+    END
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS settings (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    )
+    """
+]
+
+VIEWS = [
+    """
+    CREATE VIEW IF NOT EXISTS queue AS
+        SELECT id, url, state AS status, added_at
+        FROM jobs WHERE state = 'pending'
+    """,
+    """
+    CREATE VIEW IF NOT EXISTS processing AS
+        SELECT id, url, job_title, job_company, degree, degree_reason, feedback, resume, resume_pdf,
+               cover_letter, cover_letter_pdf, state AS status, started_at, job_data
+        FROM jobs WHERE state IN ('scraping', 'scraped', 'writing')
+    """,
+    """
+    CREATE VIEW IF NOT EXISTS processed AS
+        SELECT id, url, job_title, job_company, degree, degree_reason, feedback, resume, resume_pdf,
+               cover_letter, cover_letter_pdf, state AS status, started_at, finished_at, emailed, job_data
+        FROM jobs WHERE state = 'written'
+    """,
+    """
+    CREATE VIEW IF NOT EXISTS unable_to_scrape AS
+        SELECT id, url, error, finished_at AS added_at, job_title, job_company, degree, degree_reason, feedback,
+               resume, resume_pdf, cover_letter, cover_letter_pdf, submission_status, started_at, job_data
+        FROM jobs WHERE state = 'unable_to_scrape'
+    """
+]
+
+# Columns copied from the tables used before the jobs table: (jobs columns, legacy expressions).
+# processed goes first so finished jobs keep their ids (output folders and emails refer to them).
+LEGACY_COLUMNS = {
+    "processed": (
+        "url, state, added_at, started_at, finished_at, job_title, job_company, degree, degree_reason, feedback, "
+        "resume, resume_pdf, cover_letter, cover_letter_pdf, emailed, job_data",
+        "url, 'written', started_at, started_at, finished_at, job_title, job_company, degree, degree_reason, feedback, "
+        "resume, resume_pdf, cover_letter, cover_letter_pdf, emailed, job_data"
+    ),
+    "unable_to_scrape": (
+        "url, state, added_at, started_at, finished_at, job_title, job_company, degree, degree_reason, feedback, "
+        "resume, resume_pdf, cover_letter, cover_letter_pdf, error, submission_status, job_data",
+        "url, 'unable_to_scrape', COALESCE(started_at, added_at), started_at, added_at, job_title, job_company, degree, "
+        "degree_reason, feedback, resume, resume_pdf, cover_letter, cover_letter_pdf, error, submission_status, job_data"
+    ),
+    # 'written' rows never made it to processed; send them back to the writer
+    "processing": (
+        "url, state, added_at, started_at, job_title, job_company, degree, degree_reason, feedback, "
+        "resume, resume_pdf, cover_letter, cover_letter_pdf, job_data",
+        "url, CASE WHEN status IN ('scraping', 'scraped', 'writing') THEN status ELSE 'scraped' END, started_at, "
+        "started_at, job_title, job_company, degree, degree_reason, feedback, resume, resume_pdf, cover_letter, "
+        "cover_letter_pdf, job_data"
+    ),
+    "queue": ("url, state, added_at", "url, 'pending', added_at")
+}
+
+def _legacy_tables(conn):
+    names = ", ".join(f"'{name}'" for name in LEGACY_COLUMNS)
+    cursor = conn.execute(f"SELECT name FROM sqlite_master WHERE type='table' AND name IN ({names})")
+    return {row[0] for row in cursor.fetchall()}
+
+def _columns(conn, table):
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})").fetchall()}
+
+# === Migrations ===
+# Each runs inside one transaction. They also have to cope with databases created
+# before versioning (user_version 0 but some of the schema present), hence the
+# IF NOT EXISTS clauses and column checks.
+
+def create_jobs_table(conn):
+    for statement in JOBS_SCHEMA:
+        conn.execute(statement)
+
+    legacy = _legacy_tables(conn)
+    if legacy:
+        print(f"Migrating {', '.join(sorted(legacy))} into the jobs table...")
+        # First every row whose id is still free keeps it, then the rest get new ids.
+        # A URL already copied is skipped.
+        for name, (columns, expressions) in LEGACY_COLUMNS.items():
+            if name in legacy:
+                conn.execute(f"""
+                    INSERT INTO jobs (id, {columns}) SELECT id, {expressions} FROM {name}
+                    WHERE id NOT IN (SELECT id FROM jobs) AND url NOT IN (SELECT url FROM jobs)
+                """)
+        for name, (columns, expressions) in LEGACY_COLUMNS.items():
+            if name in legacy:
+                conn.execute(f"INSERT INTO jobs ({columns}) SELECT {expressions} FROM {name} WHERE url NOT IN (SELECT url FROM jobs)")
+                conn.execute(f"DROP TABLE {name}")
+
+    for statement in VIEWS:
+        conn.execute(statement)
+
+def add_job_leases(conn):
+    existing = _columns(conn, "jobs")
+    for name, column_type in (("lease_owner", "TEXT"), ("lease_expires_at", "TIMESTAMP")):
+        if name not in existing:
+            conn.execute(f"ALTER TABLE jobs ADD COLUMN {name} {column_type}")
+
+def add_hot_query_indexes(conn):
+    # Claims use jobs_state (state, id) from migration 1 and URL lookups the UNIQUE index on url.
+    # Emailer: the few written jobs not emailed yet, without walking every finished job
+    conn.execute("CREATE INDEX IF NOT EXISTS jobs_state_emailed ON jobs (state, emailed)")
+    # Lease heartbeat: only leased rows are indexed
+    conn.execute("CREATE INDEX IF NOT EXISTS jobs_lease_owner ON jobs (lease_owner) WHERE lease_owner IS NOT NULL")
+
+# Views without the payload columns; the *_blob hashes are resolved through blob_store
+PAYLOAD_FREE_VIEWS = [
+    """
+    CREATE VIEW processing AS
+        SELECT id, url, job_title, job_company, degree, degree_reason, resume_pdf, cover_letter_pdf,
+               state AS status, started_at, job_data_blob
+        FROM jobs WHERE state IN ('scraping', 'scraped', 'writing')
+    """,
+    """
+    CREATE VIEW processed AS
+        SELECT id, url, job_title, job_company, degree, degree_reason, resume_pdf, cover_letter_pdf,
+               state AS status, started_at, finished_at, emailed, job_data_blob, resume_blob, cover_letter_blob, feedback_blob
+        FROM jobs WHERE state = 'written'
+    """,
+    """
+    CREATE VIEW unable_to_scrape AS
+        SELECT id, url, error, finished_at AS added_at, job_title, job_company, submission_status, started_at, job_data_blob
+        FROM jobs WHERE state = 'unable_to_scrape'
+    """
+]
+
+def move_payloads_to_blobs(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS blobs (
+            hash TEXT PRIMARY KEY,
+            codec TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            data BLOB NOT NULL
+        )
+    """)
+    existing = _columns(conn, "jobs")
+    for blob_column in BLOB_COLUMNS.values():
+        if blob_column not in existing:
+            conn.execute(f"ALTER TABLE jobs ADD COLUMN {blob_column} TEXT")
+
+    # job_data for every job; texts only for finished ones (in-progress rows hold streaming drafts)
+    job_ids = [row[0] for row in conn.execute("SELECT id FROM jobs WHERE job_data IS NOT NULL OR state = 'written'").fetchall()]
+    print(f"Moving the payloads of {len(job_ids)} jobs into the blob store...")
+    for job_id in job_ids:
+        state, *payloads = conn.execute(f"SELECT state, {', '.join(BLOB_COLUMNS)} FROM jobs WHERE id=?", (job_id,)).fetchone()
+        moved = {}
+        for (column, blob_column), text in zip(BLOB_COLUMNS.items(), payloads):
+            if text is not None and (column == "job_data" or state == "written"):
+                moved[blob_column] = blob_store.put(conn, text)
+                moved[column] = None
+        if moved:
+            assignments = ", ".join(f"{column}=?" for column in moved)
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE id=?", (*moved.values(), job_id))
+
+    for view in ("processing", "processed", "unable_to_scrape"):
+        conn.execute(f"DROP VIEW IF EXISTS {view}")
+    for statement in PAYLOAD_FREE_VIEWS:
+        conn.execute(statement)
+
+def create_llm_usage_table(conn):
+    # One row per OpenAI call, written by llm.record_usage
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS llm_usage (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            model TEXT,
+            prompt_tokens INTEGER,
+            cached_tokens INTEGER,
+            completion_tokens INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+def create_degree_cache_table(conn):
+    # Degree-judge answers, see degree_cache.py
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS degree_cache (
+            description_hash TEXT PRIMARY KEY,
+            education_hash TEXT,
+            signature TEXT,
+            degree TEXT,
+            degree_reason TEXT,
+            job_title TEXT,
+            job_company TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    # Near-duplicate scans and the purge of stale decisions select by education
+    conn.execute("CREATE INDEX IF NOT EXISTS degree_cache_education ON degree_cache (education_hash)")
+
+def use_partial_emailer_index(conn):
+    # The (state, emailed) index from migration 3 also won plain state lookups such as the
+    # GUI processing list over jobs_state (state, id); index only written jobs so the
+    # emailer is the only query that can use it
+    conn.execute("DROP INDEX IF EXISTS jobs_state_emailed")
+    conn.execute("CREATE INDEX IF NOT EXISTS jobs_written_emailed ON jobs (emailed) WHERE state = 'written'")
+
+def add_write_attempts(conn):
+    # Failed writes per job, so one that keeps failing is given up on (writer.fail_writing_job)
+    if "write_attempts" not in _columns(conn, "jobs"):
+        conn.execute("ALTER TABLE jobs ADD COLUMN write_attempts INTEGER NOT NULL DEFAULT 0")
+
+def show_drafts_in_processing(conn):
+    # Jobs being written keep their streaming drafts inline in resume and cover_letter
+    # (writer.StreamingDraft); the migration 4 processing view left them out
+    conn.execute("DROP VIEW IF EXISTS processing")
+    conn.execute("""
+        CREATE VIEW processing AS
+            SELECT id, url, job_title, job_company, degree, degree_reason, resume, resume_pdf, cover_letter,
+                   cover_letter_pdf, state AS status, started_at, job_data_blob
+            FROM jobs WHERE state IN ('scraping', 'scraped', 'writing')
+    """)
+
+# (version, description, function), in order
+MIGRATIONS = [
+    (1, "single jobs table with transition history and compatibility views", create_jobs_table),
+    (2, "job lease columns", add_job_leases),
+    (3, "indexes for the emailer and lease heartbeat queries", add_hot_query_indexes),
+    (4, "job payloads in the content-addressed blob store", move_payloads_to_blobs),
+    (5, "LLM token usage table", create_llm_usage_table),
+    (6, "degree judge cache table", create_degree_cache_table),
+    (7, "partial index for the emailer query", use_partial_emailer_index),
+    (8, "failed write attempts per job", add_write_attempts),
+    (9, "streaming drafts in the processing view", show_drafts_in_processing)
+]
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def migrate(conn, target=None):
+    """Apply every migration newer than the database's user_version (up to target). Returns the new version."""
+    for version, description, apply in MIGRATIONS:
+        if target is not None and version > target:
+            break
+        if version <= schema_version(conn):
+            continue
+        conn.commit()
+        # IMMEDIATE takes the write lock up front, so a second process (GUI and pipeline
+        # starting together) waits here and then sees the migration already applied
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if version > schema_version(conn):
+                print(f"Applying database migration {version}: {description}")
+                apply(conn)
+                conn.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+    return schema_version(conn)
+
+def init_database(conn):
+    """Bring the database up to the latest schema version."""
+    return migrate(conn)
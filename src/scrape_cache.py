@@ -0,0 +1,103 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+from urllib.parse import urlparse, parse_qsl, urlencode, urlunparse
+from src.settings import config
+
+# On-disk scrape cache keyed by canonical URL. Each entry keeps the extracted job_data,
+# when it was fetched, the HTTP validators (ETag / Last-Modified) and a content hash.
+# A second index maps content hashes to the URL that first produced them, so the same
+# posting reached through a different URL can be recognised.
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+CACHE_DIR = os.path.join(BASE_DIR, "db", "scrape_cache")
+ENTRY_DIR = os.path.join(CACHE_DIR, "urls")
+HASH_DIR = os.path.join(CACHE_DIR, "hashes")
+
+TRACKING_PARAMS = {
+    "gclid", "fbclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid", "_hsenc", "_hsmi",
+    "ref", "referrer", "source", "src", "trk", "trackingid", "gh_src", "lever-source",
+    "lever-origin", "utm", "campaign"
+}
+
+def canonicalize_url(url):
+    """Lowercase scheme/host, drop fragments, default ports, tracking params and trailing slashes; sort the query."""
+    parsed = urlparse(url.strip())
+    scheme = parsed.scheme.lower()
+    host = (parsed.hostname or "").lower()
+    if parsed.port and not ((scheme == "http" and parsed.port == 80) or (scheme == "https" and parsed.port == 443)):
+        host = f"{host}:{parsed.port}"
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    )
+    path = parsed.path.rstrip("/") or "/"
+    return urlunparse((scheme, host, path, "", urlencode(query), ""))
+
+def content_hash(job_data):
+    """Hash of the normalized title and description; scrape metrics and form fields are ignored."""
+    text = f"{job_data.get('title', '')}\n{job_data.get('description', '')}"
+    normalized = " ".join(text.lower().split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+def _key(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def _read(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _write(path, data):
+    # Write to a temp file and rename, so concurrent workers never read a partial entry
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+def ttl_seconds():
+    return float(config("SCRAPE_CACHE_TTL")) * 3600
+
+def lookup(url):
+    """Return the cache entry for url (fresh or stale), or None."""
+    if ttl_seconds() <= 0:
+        return None
+    return _read(os.path.join(ENTRY_DIR, _key(canonicalize_url(url)) + ".json"))
+
+def is_fresh(entry):
+    return entry is not None and time.time() - entry["fetched_at"] < ttl_seconds()
+
+def store(url, job_data, etag=None, last_modified=None):
+    """Cache job_data for url and claim its content hash if no other URL has yet."""
+    if ttl_seconds() <= 0:
+        return None
+    canonical_url = canonicalize_url(url)
+    digest = content_hash(job_data)
+    entry = {
+        "url": url,
+        "canonical_url": canonical_url,
+        "fetched_at": time.time(),
+        "etag": etag,
+        "last_modified": last_modified,
+        "content_hash": digest,
+        "job_data": job_data
+    }
+    _write(os.path.join(ENTRY_DIR, _key(canonical_url) + ".json"), entry)
+
+    hash_path = os.path.join(HASH_DIR, digest + ".json")
+    if _read(hash_path) is None:
+        _write(hash_path, {"canonical_url": canonical_url, "url": url})
+    return entry
+
+def duplicate_of(url, job_data):
+    """Return the URL of an earlier posting with the same content under a different URL, or None."""
+    if ttl_seconds() <= 0:
+        return None
+    owner = _read(os.path.join(HASH_DIR, content_hash(job_data) + ".json"))
+    if owner and owner["canonical_url"] != canonicalize_url(url):
+        return owner["url"]
+    return None
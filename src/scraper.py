@@ -1,51 +1,217 @@
-from playwright.async_api import async_playwright
 import json
-import sqlite3
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from urllib.parse import urlparse
 from dotenv import load_dotenv
-import os
 from src.settings import config
+from src.db import transaction
+from src.jobs import transition, claim, worker_id
+from src import blob_store
+from src.browser_pool import get_browser_pool
+from src.readiness import load_until_ready, wait_for_text_growth
+from src.resource_blocker import create_resource_blocker, log_blocking_report
+from src.http_fetch import fetch_html, parse_static_job_page
+from src.extractors import extract_job
+from src import scrape_cache
+from src.events import bus
 
 # Load environment variables
 load_dotenv()
 
-# Paths
-BASE_DIR = os.path.dirname(os.path.dirname(__file__))
-DB_PATH = os.path.join(BASE_DIR, "db", "data.db")
+# Selectors probed in order; the first match with non-empty text wins
+TITLE_SELECTORS = ["h1", "h2", ".jobTitle", "div.job-header > span", "div.job-title"]
+DESCRIPTION_SELECTORS = ["div.job-description", "section[data-automation-id='jobDescription']", "#jobDescriptionText", "article"]
+
+# Runs inside the page and returns everything scrape_form needs in one structured result.
+# Falls back to the full page text when no description selector matches.
+EXTRACT_PAGE_SCRIPT = """
+({titleSelectors, descriptionSelectors}) => {
+    const firstText = (selectors) => {
+        for (const selector of selectors) {
+            const element = document.querySelector(selector);
+            if (element) {
+                const text = (element.innerText || "").trim();
+                if (text) return text;
+            }
+        }
+        return "";
+    };
+    const formFields = Array.from(document.querySelectorAll("input, select, textarea, button"))
+        .map((element) => ({
+            type: element.getAttribute("type") || "unknown",
+            name: element.getAttribute("name") || element.getAttribute("id") || "unknown",
+            placeholder: element.getAttribute("placeholder") || "",
+            label: (element.innerText || "").trim()
+        }))
+        .filter((field) => field.name !== "unknown");
+    return {
+        title: firstText(titleSelectors),
+        description: firstText(descriptionSelectors) || (document.body ? document.body.innerText : ""),
+        formFields: formFields
+    };
+}
+"""
+
+# Multi-tenant job platforms: every company's board (acme.wd5.myworkdayjobs.com,
+# boards.greenhouse.io/acme, ...) is served by the same platform, so they share one limit
+PLATFORM_DOMAINS = ("myworkdayjobs.com", "greenhouse.io", "lever.co", "ashbyhq.com")
+
+def host_key(url):
+    """
+    The per-host limiter key: the platform domain for the job platforms above, else the full hostname
+    (cutting it down to the last labels would put every *.co.uk or *.com.au site under one limit).
+    """
+    host = (urlparse(url).hostname or "").lower()
+    for domain in PLATFORM_DOMAINS:
+        if host == domain or host.endswith("." + domain):
+            return domain
+    return host
+
+class HostLimiter:
+    """Caps concurrent scrapes per host and spaces out page loads to the same host."""
+    def __init__(self, per_host, delay):
+        self.per_host = per_host
+        self.delay = delay
+        self._semaphores = {}
+        self._locks = {}
+        self._last_start = {}
+
+    @asynccontextmanager
+    async def slot(self, url):
+        key = host_key(url)
+        semaphore = self._semaphores.setdefault(key, asyncio.Semaphore(self.per_host))
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with semaphore:
+            # Politeness delay: wait until `delay` seconds have passed since the last load on this host
+            async with lock:
+                loop = asyncio.get_running_loop()
+                wait = self._last_start.get(key, 0) + self.delay - loop.time()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                self._last_start[key] = loop.time()
+            yield
+
+_host_limiter = None
+
+def get_host_limiter():
+    """Return the process-wide per-host limiter, created from settings on first use."""
+    global _host_limiter
+    if _host_limiter is None:
+        _host_limiter = HostLimiter(int(config("SCRAPE_PER_HOST_LIMIT")), float(config("SCRAPE_POLITENESS_DELAY")))
+    return _host_limiter
+
+def assess_job_data(job_data):
+    """Return why scraped job_data is unusable, or None if it has enough real content."""
+    # Case 1: Timeout or page load error
+    if "error" in job_data:
+        return job_data["error"]
 
-def clean_data(data):
-    """Remove empty fields to reduce token usage."""
-    if isinstance(data, dict):
-        return {k: clean_data(v) for k, v in data.items() if v and v != "unknown"}
-    elif isinstance(data, list):
-        return [clean_data(v) for v in data if v and v != "unknown"]
-    return data
+    # Case 2: Scrape returned "Unknown" title
+    if job_data.get("title") == "Unknown":
+        return "Unknown job title"
+
+    # Case 3: Very short scraped content (< 1000 characters)
+    total_length = (
+        len(job_data.get("title", "").strip()) +
+        len(job_data.get("description", "").strip()) +
+        sum(len(f.get("label", "").strip()) for f in job_data.get("form_fields", []))
+    )
+    if total_length < 1000:
+        return f"Insufficient content ({total_length} chars)"
+
+    # Case 4: Cloud block page served over plain HTTP
+    if "access to this page is restricted" in job_data.get("description", "").lower():
+        return "Cloud protection block page"
+
+    return None
+
+def scrape_over_http(url, cached=None):
+    """
+    HTTP-only scrape: the site extractor's API first, then the static page
+    (JSON-LD JobPosting, else its visible text). A stale cache entry's ETag/Last-Modified
+    are sent so an unchanged page (304) reuses the cached job_data.
+    Returns (job_data, response); job_data is None if nothing could be fetched.
+    """
+    started = time.perf_counter()
+    response = None
+    job_data = extract_job(url)
+    if job_data is None or assess_job_data(job_data):
+        validators = {}
+        if cached and cached.get("etag"):
+            validators["If-None-Match"] = cached["etag"]
+        if cached and cached.get("last_modified"):
+            validators["If-Modified-Since"] = cached["last_modified"]
+        page_html, response = fetch_html(url, validators)
+        if response is not None and response.status_code == 304:
+            job_data = dict(cached["job_data"])
+        elif page_html is None:
+            return None, response
+        else:
+            job_data = extract_job(url, page_html) or parse_static_job_page(page_html)
+    job_data["metrics"] = {
+        "method": "http-304" if response is not None and response.status_code == 304 else "http",
+        "fetch_ms": round((time.perf_counter() - started) * 1000)
+    }
+    return job_data, response
 
 async def scrape_form(url):
-    """Scrapes the job posting and form details."""
-    async with async_playwright() as p:
-        # Launch browser
-        browser = await p.chromium.launch(headless=True)
-
-        # Use a real browser user-agent to reduce bot detection
-        real_user_agent = (
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) "
-            "Chrome/120.0.0.0 Safari/537.36"
-        )
+    """Scrapes the job posting and form details: cache, then plain HTTP, then the browser."""
+    # Retries and re-queued URLs reuse a fresh cached result instead of fetching again
+    cached = scrape_cache.lookup(url)
+    if scrape_cache.is_fresh(cached):
+        print(f"Using cached scrape from {time.strftime('%Y-%m-%d %H:%M', time.localtime(cached['fetched_at']))}: {url}")
+        job_data = dict(cached["job_data"])
+        job_data["metrics"] = {"method": "cache"}
+        return job_data
 
-        context = await browser.new_context(
-            java_script_enabled=True,
-            user_agent=real_user_agent
+    # Only requests that reach the site count against the per-host limits
+    async with get_host_limiter().slot(url):
+        return await fetch_job_data(url, cached)
+
+async def fetch_job_data(url, cached):
+    """Plain HTTP (revalidating a stale cache entry), then the browser; stores usable results in the cache."""
+    job_data, response = None, None
+    if bool(int(config("HTTP_FIRST"))):
+        job_data, response = await asyncio.to_thread(scrape_over_http, url, cached)
+        if job_data is not None:
+            reason = assess_job_data(job_data)
+            if reason:
+                print(f"HTTP fetch not usable ({reason}), falling back to browser: {url}")
+                job_data, response = None, None
+            else:
+                print(f"Scraped over HTTP in {job_data['metrics']['fetch_ms']} ms: {url}")
+
+    if job_data is None:
+        job_data = await scrape_form_with_browser(url)
+
+    if not assess_job_data(job_data):
+        headers = response.headers if response is not None else {}
+        etag, last_modified = headers.get("ETag"), headers.get("Last-Modified")
+        if response is not None and response.status_code == 304:
+            etag = etag or cached.get("etag")
+            last_modified = last_modified or cached.get("last_modified")
+        await asyncio.to_thread(
+            scrape_cache.store, url, {k: v for k, v in job_data.items() if k != "metrics"},
+            etag, last_modified
         )
-
-        page = await context.new_page()
-
-        # Try loading the page with an extended timeout
+    return job_data
+
+async def scrape_form_with_browser(url):
+    """Scrapes the job posting and form details in a pooled browser page."""
+    # Pages come from a long-lived browser pool, so Chromium starts once per process, not once per job
+    async with get_browser_pool().page() as page:
+        # Skip images, fonts, media and trackers: only the page text is used
+        blocker = create_resource_blocker()
+        if blocker:
+            await blocker.attach(page)
+
+        # Load the page and wait for the job content (per-site profile) rather than network idle,
+        # which SPA job boards may never reach
         try:
-            await page.goto(url, wait_until="networkidle", timeout=30000)  # Increased timeout to 30s
+            metrics = await load_until_ready(page, url, DESCRIPTION_SELECTORS)
         except Exception as e:
             print(f"Error loading page: {e}")
-            await browser.close()
             return {
                 "title": "",
                 "description": "",
@@ -53,174 +219,162 @@ async def scrape_form(url):
                 "error": str(e)
             }
 
+        if blocker:
+            metrics["resources"] = blocker.report(metrics["time_to_ready_ms"])
+            log_blocking_report(url, metrics["resources"])
+
         # Click "Accept Cookies" only if it exists
         accept_button = await page.query_selector("button#accept-recommended-btn-handler, button:has-text('Accept All')")
         if accept_button:
             is_visible = await accept_button.is_visible()
             if is_visible:
                 await accept_button.click()
-                await page.wait_for_timeout(2000)  # Wait for page update after clicking
+                # Wait for the banner to go away instead of a fixed delay
+                try:
+                    await accept_button.wait_for_element_state("hidden", timeout=2000)
+                except Exception:
+                    pass
             else:
                 print("Accept button found, but not visible. Skipping click.")
 
         # Click "Read More" only if it exists
         read_more_button = await page.query_selector("button:has-text('Read More'), button:has-text('Show More')")
         if read_more_button:
+            text_length = await page.evaluate("() => document.body.innerText.length")
             await read_more_button.click()
-            await page.wait_for_timeout(2000)
-
-        # Extract job title from multiple selectors
-        possible_title_selectors = ["h1", "h2", ".jobTitle", "div.job-header > span", "div.job-title"]
-        title = "Unknown"
-        for selector in possible_title_selectors:
-            elt = await page.query_selector(selector)
-            if elt:
-                temp_title = (await elt.inner_text()).strip()
-                if temp_title:
-                    title = temp_title
-                    break
-
-        # Extract job description
-        description_selectors = ["div.job-description", "section[data-automation-id='jobDescription']", "#jobDescriptionText", "article"]
-        page_text = ""
-        for sel in description_selectors:
-            desc_element = await page.query_selector(sel)
-            if desc_element:
-                page_text = (await desc_element.inner_text()).strip()
-                if page_text:
-                    break
-
-        # Fallback: Use full page text if no description is found
-        if not page_text:
-            page_text = await page.evaluate("() => document.body.innerText")
-        
+            await wait_for_text_growth(page, text_length)
+
+        # Extract title, description and form fields in one in-page script (a single CDP round trip)
+        extracted = await page.evaluate(EXTRACT_PAGE_SCRIPT, {
+            "titleSelectors": TITLE_SELECTORS,
+            "descriptionSelectors": DESCRIPTION_SELECTORS
+        })
+        title = extracted["title"] or "Unknown"
+        page_text = extracted["description"]
+        extracted_fields = extracted["formFields"]
+
         # Detect cloud block or fake content
         if "access to this page is restricted" in page_text.lower():
             return {
                 "title": "Blocked",
                 "description": page_text.strip(),
                 "form_fields": [],
-                "error": "Cloud protection block page"
+                "error": "Cloud protection block page",
+                "metrics": metrics
             }
 
-        # Extract form fields
-        form_elements = await page.query_selector_all("input, select, textarea, button")
-        extracted_fields = []
-        for element in form_elements:
-            field_type = await element.get_attribute("type") or "unknown"
-            name = await element.get_attribute("name") or await element.get_attribute("id") or "unknown"
-            placeholder = await element.get_attribute("placeholder") or ""
-            label_text = (await element.inner_text()) or ""
-            field_data = {"type": field_type, "name": name, "placeholder": placeholder, "label": label_text.strip()}
-            if any(field_data.values()) and name != "unknown":
-                extracted_fields.append(field_data)
-
-        await browser.close()
+        # Prefer a structured extractor's precise fields (e.g. JSON-LD) over the generic selectors
+        structured = extract_job(url, await page.content())
+        if structured and not assess_job_data(structured):
+            structured["form_fields"] = structured["form_fields"] or extracted_fields
+            structured["metrics"] = {"method": "browser", **metrics}
+            return structured
 
         job_data = {
             "title": title,
             "description": page_text.strip(),
             "form_fields": extracted_fields,  # No need to clean empty fields
+            "metrics": {"method": "browser", **metrics}
         }
 
         return job_data
 
 def update_processing_table(url, job_data):
-    """Update the database with scraped job data."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("UPDATE processing SET job_data=?, status='scraped' WHERE url=?", (json.dumps(job_data), url))
-    conn.commit()
-    conn.close()
+    """Update the database with scraped job data. Returns False if this worker no longer holds the job's lease."""
+    with transaction() as conn:
+        changed = transition(conn, "scraped", url=url, worker=worker_id(), job_data_blob=blob_store.put(conn, json.dumps(job_data)))
+    if not changed:
+        print(f"Lease on {url} was lost while scraping, another worker took it over.")
+        return False
     print(f"Updated processing table with scraped job: {url}")
+    return True
 
-async def process_next_job():
-    """Move a job from queue to processing and scrape it."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("SELECT id, url FROM queue ORDER BY id ASC LIMIT 1")
-    job = cursor.fetchone()
+def claim_next_job():
+    """Lease the oldest pending job for scraping and return its URL (None if the queue is empty)."""
+    with transaction() as conn:
+        job = claim(conn, "pending", "scraping")
 
     if not job:
         # print("No jobs in queue to scrape.")
-        conn.close()
-        return False
+        return None
 
     job_id, job_url = job
     print(f"Processing job: {job_url}")
+    return job_url
 
-    # Move job to processing
-    cursor.execute("DELETE FROM queue WHERE id=?", (job_id,))
-    cursor.execute("INSERT INTO processing (url, status) VALUES (?, 'scraping')", (job_url,))
-    conn.commit()
-    conn.close()
-
-    # Scrape job (now properly awaiting async function)
+async def process_next_job():
+    """Move a job from queue to processing and scrape it. Returns None if the queue was empty, else whether it scraped."""
+    job_url = claim_next_job()
+    if not job_url:
+        return None
+    return await scrape_job(job_url)
+
+async def process_job_batch(batch_size):
+    """Claim up to batch_size queued jobs and scrape them concurrently. Returns (jobs claimed, jobs scraped successfully)."""
+    job_urls = []
+    for _ in range(batch_size):
+        job_url = claim_next_job()
+        if not job_url:
+            break
+        job_urls.append(job_url)
+
+    if not job_urls:
+        return 0, 0
+
+    results = await asyncio.gather(*(scrape_job(url) for url in job_urls), return_exceptions=True)
+    for job_url, result in zip(job_urls, results):
+        if isinstance(result, Exception):
+            print(f"Error scraping {job_url}: {result}")
+    scraped = sum(1 for result in results if result is True)
+    print(f"Batch scraped {scraped}/{len(job_urls)} jobs.")
+    return len(job_urls), scraped
+
+def release_failed_scrape(job_url, error):
+    """Move a job whose scrape raised to unable_to_scrape, so its lease is not held (and renewed) forever."""
+    with transaction() as conn:
+        transition(conn, "unable_to_scrape", url=job_url, from_state="scraping", worker=worker_id(), error=f"Scrape failed: {error}")
+    print(f"ERROR: {job_url} -> {error}, moved to unable_to_scrape")
+
+async def scrape_job(job_url):
+    """Scrape a job already claimed for scraping; mark it unable_to_scrape if the scrape fails or raises."""
+    try:
+        return await _scrape_claimed_job(job_url)
+    except Exception as e:
+        release_failed_scrape(job_url, e)
+        raise
+
+async def _scrape_claimed_job(job_url):
+    # Scrape job (now properly awaiting async function), respecting the per-host limits
     job_data = await scrape_form(job_url)
 
     # --- HANDLE FAILURES EARLY ---
-    move_to_unable_to_scrape = False
-    failure_reason = ""
-
-    # Case 1: Timeout or page load error
-    if "error" in job_data:
-        failure_reason = job_data["error"]
-        move_to_unable_to_scrape = True
-
-    # Case 2: Scrape returned "Unknown" title
-    elif job_data.get("title") == "Unknown":
-        failure_reason = "Unknown job title"
-        move_to_unable_to_scrape = True
-
-    # Case 3: Very short scraped content (< 1000 characters)
-    else:
-        total_length = (
-            len(job_data.get("title", "").strip()) +
-            len(job_data.get("description", "").strip()) +
-            sum(len(f.get("label", "").strip()) for f in job_data.get("form_fields", []))
-        )
+    failure_reason = assess_job_data(job_data)
 
-        if total_length < 1000:
-            failure_reason = f"Insufficient content ({total_length} chars)"
-            move_to_unable_to_scrape = True
+    # Same posting already scraped under a different URL (tracking links, reposts)
+    if not failure_reason:
+        original_url = scrape_cache.duplicate_of(job_url, job_data)
+        if original_url:
+            failure_reason = f"Duplicate posting of {original_url}"
 
     # --- If any failure case was met, move to unable_to_scrape ---
-    if move_to_unable_to_scrape:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-
-        # Fetch the original job ID from processing before deleting
-        cursor.execute("SELECT id FROM processing WHERE url=?", (job_url,))
-        existing_id = cursor.fetchone()
-        job_id = existing_id[0] if existing_id else None  # Keep original ID if exists
-
-        # Convert scraped data to JSON format for storage
-        full_job_data = json.dumps(job_data)
-
-        # Insert into unable_to_scrape, keeping the original id if available
-        if job_id:
-            cursor.execute("""
-                INSERT INTO unable_to_scrape (
-                    id, url, error, added_at, job_title, job_data
-                ) VALUES (?, ?, ?, CURRENT_TIMESTAMP, ?, ?)
-            """, (job_id, job_url, failure_reason, job_data.get("title", "Unknown"), full_job_data))
-        else:
-            cursor.execute("""
-                INSERT INTO unable_to_scrape (
-                    url, error, added_at, job_title, job_data
-                ) VALUES (?, ?, CURRENT_TIMESTAMP, ?, ?)
-            """, (job_url, failure_reason, job_data.get("title", "Unknown"), full_job_data))
-
-        # REMOVE FROM PROCESSING IMMEDIATELY
-        cursor.execute("DELETE FROM processing WHERE url=?", (job_url,))
-        conn.commit()
-        conn.close()
-
-        print(f"BLOCKED: {job_url} -> {failure_reason}, moved to unable_to_scrape with full data, retaining id={job_id if job_id else 'NEW'}")
+    if failure_reason:
+        with transaction() as conn:
+            transition(
+                conn, "unable_to_scrape", url=job_url, worker=worker_id(),
+                error=failure_reason, job_title=job_data.get("title", "Unknown"),
+                job_data_blob=blob_store.put(conn, json.dumps(job_data))
+            )
+            existing_id = conn.execute("SELECT id FROM jobs WHERE url=?", (job_url,)).fetchone()
+            job_id = existing_id[0] if existing_id else None
+
+        print(f"BLOCKED: {job_url} -> {failure_reason}, moved to unable_to_scrape with full data, id={job_id}")
         return False  # STOP PROCESSING COMPLETELY
 
     # Otherwise, update processing with normal job data
-    update_processing_table(job_url, job_data)
+    if not update_processing_table(job_url, job_data):
+        return False
+    # Wakes the bulk writer, which collects scraped jobs from the table
+    bus.notify("scraped")
     return True
 
 if __name__ == "__main__":
@@ -1,24 +1,21 @@
 import os
-import sqlite3
 from dotenv import load_dotenv
-
-# === Paths ===
-BASE_DIR = os.path.dirname(os.path.dirname(__file__))
-DB_PATH = os.path.join(BASE_DIR, "db", "data.db")
+from src.db import DB_PATH, get_connection, transaction
 
 # === Load .env first ===
 load_dotenv()
 
 # === Connect to SQLite ===
+_settings_ready = set()
+
 def get_db_connection():
-    conn = sqlite3.connect(DB_PATH)
-    conn.execute("CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT)")
-    # Insert default values if they don't exist
-    cursor = conn.cursor()
-    for key, value in DEFAULTS.items():
-        cursor.execute("INSERT OR IGNORE INTO settings (key, value) VALUES (?, ?)", (key, value))
-    conn.commit()
-    return conn
+    # Create the table and insert default values once per process
+    if DB_PATH not in _settings_ready:
+        with transaction() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT)")
+            conn.executemany("INSERT OR IGNORE INTO settings (key, value) VALUES (?, ?)", DEFAULTS.items())
+        _settings_ready.add(DB_PATH)
+    return get_connection()
 
 # === Core getter ===
 def get_setting(key, fallback=None):
@@ -28,10 +25,7 @@ def get_setting(key, fallback=None):
 
     # 2. Check database (settings stored in SQLite)
     conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT value FROM settings WHERE key=?", (key,))
-    row = cursor.fetchone()
-    conn.close()
+    row = conn.execute("SELECT value FROM settings WHERE key=?", (key,)).fetchone()
 
     if row:
         # Convert '0'/'1' to boolean for GIST_INPUT
@@ -42,11 +36,9 @@ def get_setting(key, fallback=None):
 
 # === Core setter ===
 def set_setting(key, value):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", (key, value))
-    conn.commit()
-    conn.close()
+    get_db_connection()
+    with transaction() as conn:
+        conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", (key, value))
 
 # === Optional: preload useful keys ===
 DEFAULTS = {
@@ -65,7 +57,43 @@ DEFAULTS = {
     "SMTP_PASSWORD": "SecretPassword",
     "DB_PATH": DB_PATH,
     "GITHUB_TOKEN": "your_github_token_here",
-    "GIST_ID": "your_gist_id_here"
+    "GIST_ID": "your_gist_id_here",
+    "PIPELINE_MODE": False,
+    "SCRAPE_WORKERS": "2",
+    "WRITE_WORKERS": "2",
+    "PIPELINE_QUEUE_SIZE": "10",
+    "TRIGGER_PORT": "47615",
+    "GIST_POLL_MIN": "10",
+    "GIST_POLL_MAX": "300",
+    "BROWSER_POOL_SIZE": "2",
+    "BROWSER_RECYCLE_PAGES": "50",
+    "SCRAPE_BATCH_SIZE": "1",
+    "SCRAPE_PER_HOST_LIMIT": "2",
+    "SCRAPE_POLITENESS_DELAY": "2",
+    "PAGE_READY_TIMEOUT": "15",
+    "READINESS_PROFILES": "{}",
+    "RESOURCE_BLOCKING": True,
+    "BLOCK_RESOURCE_TYPES": "image,font,media",
+    "BLOCK_DOMAINS": "google-analytics.com,googletagmanager.com,doubleclick.net,facebook.net,hotjar.com,segment.io,segment.com,fullstory.com,clarity.ms,ads.linkedin.com,bat.bing.com,newrelic.com,nr-data.net",
+    "ALLOW_DOMAINS": "",
+    "HTTP_FIRST": True,
+    "SCRAPE_CACHE_TTL": "24",
+    "WRITE_BATCH_SIZE": "1",
+    "OPENAI_RPM": "500",
+    "OPENAI_TPM": "30000",
+    "OPENAI_TIMEOUT": "120",
+    "OPENAI_MAX_RETRIES": "5",
+    "CIRCUIT_BREAKER_THRESHOLD": "5",
+    "CIRCUIT_BREAKER_COOLDOWN": "120",
+    "OPENAI_BASE_URL": "",
+    "BULK_WRITER": False,
+    "BATCH_COLLECT_SECONDS": "300",
+    "BATCH_POLL_SECONDS": "60",
+    "JOB_PROMPT_TOKEN_BUDGET": "3000",
+    "DEGREE_CACHE_SIMILARITY": "0.9",
+    "STREAM_GENERATION": True,
+    "PDF_WORKERS": "2",
+    "JOB_LEASE_SECONDS": "90"
 }
 
 # Convenience wrapper to always return *something*
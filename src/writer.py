@@ -1,23 +1,21 @@
 import os
 import re
-import sqlite3
-import openai
+import time
+import asyncio
 import json
-import random
-import PyPDF2
 import requests
-from datetime import datetime, timedelta
-from reportlab.lib.pagesizes import LETTER
+from datetime import datetime
 from reportlab.lib.units import inch
-from reportlab.platypus import (
-    SimpleDocTemplate, Paragraph, Spacer, ListFlowable, ListItem
-)
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_LEFT, TA_CENTER
 from src.settings import config
+from src.db import get_connection, transaction
+from src.jobs import transition, claim, reclaim_expired, worker_id
+from src import blob_store
+from src.llm import chat, chat_stream, llm_available, CircuitOpenError
+from src.prompt_payload import build_job_payload, build_user_payload, clean_data, compact_json
+from src import degree_cache
+from src.pdf_service import MarkupLayout, parse_markup, render_pdf
 
 # Load environment variables
-openai.api_key = config("OPENAI_API_KEY")
 WRITER_MODEL = config("WRITER_MODEL")
 JUDGE_MODEL = config("JUDGE_MODEL")
 GITHUB_TOKEN = config("GITHUB_TOKEN")
@@ -27,13 +25,14 @@ GIST_URL = f"https://api.github.com/gists/{GIST_ID}"
 # Paths
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 ROOT_DIR = os.path.dirname(BASE_DIR)
-DB_DIR = os.path.join(ROOT_DIR, "db")
-DB_PATH = os.path.join(DB_DIR, "data.db")
 CONFIG_DIR = os.path.join(ROOT_DIR, "config")
 USER_FILE = os.path.join(CONFIG_DIR, "user.json")
 OUTPUT_DIR = os.path.join(ROOT_DIR, "output")
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+# A job whose writing fails this many times moves to unable_to_scrape instead of back to 'scraped'
+MAX_WRITE_ATTEMPTS = 3
+
 # Headers for authentication
 HEADERS = {
     "Authorization": f"token {GITHUB_TOKEN}",
@@ -60,58 +59,136 @@ def load_user_data():
     with open(USER_FILE, "r", encoding="utf-8") as f:
         return json.load(f)
 
-def process_next_writing_job():
+def claim_next_writing_job(job_url=None):
+    """Lease the next 'scraped' row (or the one for job_url) for writing and return it, or None."""
+    with transaction() as conn:
+        row = claim(conn, "scraped", "writing", columns="id, url, job_data_blob, degree, degree_reason, job_title", url=job_url)
+    if row:
+        job_id, url, job_data_blob, degree, degree_reason, job_title = row
+        row = (job_id, url, blob_store.get(get_connection(), job_data_blob), degree, degree_reason, job_title)
+    return row
+
+def release_writing_job(job_id):
+    """Put a 'writing' row leased by this process back to 'scraped' so it is picked up again."""
+    with transaction() as conn:
+        transition(conn, "scraped", job_id=job_id, from_state="writing", worker=worker_id())
+
+def fail_writing_job(job_id, error):
+    """
+    Count a failed write of a 'writing' row leased by this process and put it back to 'scraped',
+    or after MAX_WRITE_ATTEMPTS failures move it to unable_to_scrape with the error so it is not
+    generated (and paid for) again and again. Returns the attempts so far, None if the lease was lost.
+    """
+    worker = worker_id()
+    with transaction() as conn:
+        row = conn.execute(
+            "UPDATE jobs SET write_attempts = write_attempts + 1 WHERE id=? AND state='writing' AND lease_owner=? RETURNING write_attempts",
+            (job_id, worker)
+        ).fetchone()
+        if row is None:
+            return None
+        attempts = row[0]
+        if attempts >= MAX_WRITE_ATTEMPTS:
+            transition(conn, "unable_to_scrape", job_id=job_id, from_state="writing", worker=worker,
+                       error=f"Writing failed {attempts} times: {error}")
+        else:
+            transition(conn, "scraped", job_id=job_id, from_state="writing", worker=worker, error=str(error))
+    if attempts >= MAX_WRITE_ATTEMPTS:
+        print(f"Giving up on job id={job_id} after {attempts} failed writes: {error}")
+    return attempts
+
+def reset_interrupted_writing_jobs():
+    """Reclaim jobs whose lease expired (e.g. left by a previous run) and list every URL awaiting the writer."""
+    with transaction() as conn:
+        reclaim_expired(conn)
+    cursor = get_connection().execute("SELECT url FROM jobs WHERE state='scraped' ORDER BY id ASC")
+    return [row[0] for row in cursor.fetchall()]
+
+async def process_next_writing_job():
     """Main job logic: get next scraping, decide degree decesion, generate text, build PDFs, finalize."""
     user_data = load_user_data()
     if not user_data:
         # print("No user data loaded. Cannot generate resumes/cover letters.")
         return False
 
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT id, url, job_data, degree, degree_reason, job_title
-        FROM processing
-        WHERE status='scraped'
-        ORDER BY id ASC
-        LIMIT 1
-    """)
-    row = cursor.fetchone()
+    # Leave scraped jobs queued while the OpenAI circuit breaker is open
+    if not llm_available():
+        return False
+
+    row = claim_next_writing_job()
     if not row:
         # print("No jobs in 'scraped' status to write resumes/cover letters for.")
-        conn.close()
         return False
 
+    try:
+        return await write_job(row, user_data)
+    except CircuitOpenError as e:
+        print(f"Writing paused, job id={row[0]} returned to the queue: {e}")
+        release_writing_job(row[0])
+        return False
+    except Exception as e:
+        # One bad job must not stop the serial loop; it is retried on a later cycle up to MAX_WRITE_ATTEMPTS
+        print(f"Error writing job id={row[0]}: {e}")
+        fail_writing_job(row[0], e)
+        return False
+
+async def process_writing_batch(batch_size):
+    """Claim up to batch_size scraped jobs and write them concurrently. Returns the number written."""
+    user_data = load_user_data()
+    if not user_data or not llm_available():
+        return 0
+
+    rows = []
+    for _ in range(batch_size):
+        row = claim_next_writing_job()
+        if not row:
+            break
+        rows.append(row)
+
+    if not rows:
+        return 0
+
+    # OpenAI calls are paced by the per-model rate limiter in src/llm.py
+    results = await asyncio.gather(*(write_job(row, user_data) for row in rows), return_exceptions=True)
+    for row, result in zip(rows, results):
+        if isinstance(result, CircuitOpenError):
+            print(f"Writing paused, job id={row[0]} returned to the queue: {result}")
+            release_writing_job(row[0])
+        elif isinstance(result, Exception):
+            # Counted, so a job that always fails (e.g. unbalanced markup) is not regenerated every cycle
+            print(f"Error writing job id={row[0]}: {result}")
+            fail_writing_job(row[0], result)
+    written = sum(1 for result in results if result is True)
+    print(f"Batch wrote {written}/{len(rows)} jobs.")
+    return written
+
+async def write_job(row, user_data):
+    """Decide the degree approach, generate text, build PDFs and mark a claimed job written."""
     job_id, job_url, job_data_json, current_degree_value, degree_reason, job_title = row
     job_data = json.loads(job_data_json)
-    conn.close()
+    # Compact, pruned job JSON shared by all three prompts
+    job_json = build_job_payload(job_data, WRITER_MODEL)
 
     print(f"Preparing to generate resume & cover letter for job id={job_id}, url={job_url}")
 
     # Decide degree approach if not set, and capture job_company
     job_company = "Unknown"
     if not current_degree_value:
-        approach, explanation, job_title, job_company = determine_degree_approach(job_data, user_data)
-        conn = sqlite3.connect(DB_PATH)
-        c2 = conn.cursor()
-        c2.execute(
-            "UPDATE processing SET degree=?, degree_reason=?, job_title=?, job_company=? WHERE id=?",
-            (approach, explanation, job_title, job_company, job_id)
-        )
-        conn.commit()
-        conn.close()
+        # Reposts and near-identical postings reuse an earlier decision
+        judgment = degree_cache.lookup(job_data, user_data)
+        if judgment:
+            print(f"Reusing cached degree decision for job id={job_id}")
+        else:
+            judgment = await determine_degree_approach(job_json, user_data)
+            degree_cache.store(job_data, user_data, judgment)
+        approach, explanation, job_title, job_company = judgment
+        save_degree_decision(job_id, approach, explanation, job_title, job_company)
         current_degree_value = approach
         degree_reason = explanation
         print(f"Decided degree approach='{approach}' for job id={job_id}\nReason: {explanation}\nJob Title: {job_title}\nCompany: {job_company}")
     else:
         # If already set, fetch the existing job_company from DB
-        conn = sqlite3.connect(DB_PATH)
-        c2 = conn.cursor()
-        c2.execute("SELECT job_company FROM processing WHERE id=?", (job_id,))
-        row_company = c2.fetchone()
-        conn.close()
-        if row_company and row_company[0]:
-            job_company = row_company[0]
+        job_company = load_job_company(job_id) or job_company
         print(f"degree approach already decided: {current_degree_value} for job id={job_id}")
         if degree_reason:
             print(f"Reason: {degree_reason}")
@@ -119,10 +196,74 @@ def process_next_writing_job():
             print(f"Job Title: {job_title}")
         print(f"Company: {job_company}")
 
-    # 2) Generate textual resume & cover letter
-    resume_text, feedback = generate_resume_text(user_data, job_data, current_degree_value, degree_reason)
-    cover_letter_text = generate_cover_letter_text(user_data, job_data, current_degree_value, degree_reason)
+    # 2) Generate textual resume & cover letter concurrently (both only need the degree decision).
+    # When streaming, each draft is saved to the row and laid out as the text arrives.
+    resume_draft = cover_letter_draft = None
+    if bool(int(config("STREAM_GENERATION"))):
+        resume_draft = StreamingDraft(job_id, "resume", "resume")
+        cover_letter_draft = StreamingDraft(job_id, "cover_letter", "cover letter")
+    (resume_text, feedback), cover_letter_text = await asyncio.gather(
+        generate_resume_text(user_data, job_json, current_degree_value, degree_reason, resume_draft),
+        generate_cover_letter_text(user_data, job_json, current_degree_value, degree_reason, cover_letter_draft)
+    )
+
+    await finish_written_job(
+        job_id, job_url, job_title, job_company, resume_text, feedback, cover_letter_text,
+        resume_blocks=resume_draft.layout.finish() if resume_draft else None,
+        cover_letter_blocks=cover_letter_draft.layout.finish() if cover_letter_draft else None
+    )
+    return True
 
+class StreamingDraft:
+    """
+    Receives a streamed resume or cover letter (see llm.chat_stream): lays it out line by line,
+    saves the partial text to the job's row and prints progress for the console.
+    """
+    SAVE_INTERVAL = 2.0
+
+    def __init__(self, job_id, column, label):
+        self.job_id = job_id
+        self.column = column  # "resume" or "cover_letter"
+        self.label = label
+        self.reset()
+
+    def reset(self):
+        self.parts = []
+        self.chars = 0
+        self.layout = MarkupLayout()
+        self._last_save = time.monotonic()
+
+    def feed(self, delta):
+        self.parts.append(delta)
+        self.chars += len(delta)
+        self.layout.feed(delta)
+        if time.monotonic() - self._last_save >= self.SAVE_INTERVAL:
+            self.save()
+            print(f"Job id={self.job_id}: {self.label} {self.chars} characters, {len(self.layout.blocks)} paragraphs laid out")
+
+    def save(self):
+        # Partial text survives a crash; finish_written_job clears it once the final text is in the blob store
+        self._last_save = time.monotonic()
+        with transaction() as conn:
+            conn.execute(f"UPDATE jobs SET {self.column}=? WHERE id=?", ("".join(self.parts), self.job_id))
+
+def save_degree_decision(job_id, approach, explanation, job_title, job_company):
+    with transaction() as conn:
+        conn.execute(
+            "UPDATE jobs SET degree=?, degree_reason=?, job_title=?, job_company=? WHERE id=?",
+            (approach, explanation, job_title, job_company, job_id)
+        )
+
+def load_job_company(job_id):
+    row_company = get_connection().execute("SELECT job_company FROM jobs WHERE id=?", (job_id,)).fetchone()
+    return row_company[0] if row_company else None
+
+async def finish_written_job(job_id, job_url, job_title, job_company, resume_text, feedback, cover_letter_text,
+                             resume_blocks=None, cover_letter_blocks=None):
+    """
+    Build PDFs from the generated text, mark the job written and mark the Gist entry done.
+    Layout blocks already built while streaming are used as-is; otherwise the text is laid out here.
+    """
     # 3) Convert to PDF (reportlab)
     # Build a directory name that's safe on Windows
     folder_name = f"{job_id} - {job_title} - {job_company}"
@@ -136,95 +277,86 @@ def process_next_writing_job():
     plain_resume = strip_reportlab_tags(resume_text)
     plain_cover = strip_reportlab_tags(cover_letter_text)
 
-    # Build PDFs
-    create_pdf_reportlab(
-        resume_text, resume_pdf_path, doc_title=f"{FULL_NAME}",
-        leftMargin=0.5*inch, rightMargin=0.5*inch, topMargin=0.5*inch, bottomMargin=0.5*inch,
-        job_title=job_title, creation_time_range=(2*24*60, 14*24*60)
-    )
+    if resume_blocks is None:
+        resume_blocks = parse_markup(resume_text)
+    if cover_letter_blocks is None:
+        cover_letter_blocks = parse_markup(cover_letter_text)
 
-    create_pdf_reportlab(
-        cover_letter_text, cover_letter_pdf_path, doc_title=f"{FULL_NAME} - Cover Letter for {job_title}",
-        job_title=job_title, creation_time_range=(2, 60)
+    # Render both PDFs in the PDF worker processes so the event loop keeps running
+    await asyncio.gather(
+        build_resume_pdf(resume_blocks, resume_pdf_path, job_title),
+        build_cover_letter_pdf(cover_letter_blocks, cover_letter_pdf_path, job_title)
     )
 
-    post_process_pdf(resume_pdf_path, f"{FULL_NAME}", job_title, creation_time_range=(2*24*60, 14*24*60))
-    post_process_pdf(cover_letter_pdf_path, f"{FULL_NAME} - Cover Letter for {job_title}", job_title, creation_time_range=(2, 60))
-
     # Save feedback to a .txt file
     feedback_file_path = os.path.join(job_output_dir, 'feedback.txt')
     with open(feedback_file_path, 'w', encoding='utf-8') as feedback_file:
         feedback_file.write(feedback)
 
-    # 4) Update DB with final data
-    conn = sqlite3.connect(DB_PATH)
-    c3 = conn.cursor()
-    c3.execute("""
-        UPDATE processing
-        SET resume=?,
-            resume_pdf=?,
-            cover_letter=?,
-            cover_letter_pdf=?,
-            feedback=?,
-            status='written'
-        WHERE id=?
-    """, (plain_resume, resume_pdf_path, plain_cover, cover_letter_pdf_path, feedback, job_id))
-    conn.commit()
-
-    # 5) Move this record to 'processed' table and remove from 'processing'
-    c3.execute("""
-        INSERT INTO processed (id, url, job_title, job_company, degree, degree_reason, job_data, 
-                            resume, resume_pdf, cover_letter, cover_letter_pdf, feedback, 
-                            status, started_at, finished_at, emailed)
-        SELECT id, url, job_title, job_company, degree, degree_reason, job_data, 
-            resume, resume_pdf, cover_letter, cover_letter_pdf, feedback, 
-            status, started_at, CURRENT_TIMESTAMP, 0 
-        FROM processing WHERE id=?
-    """, (job_id,))
-
-    c3.execute("DELETE FROM processing WHERE id=?", (job_id,))
-    conn.commit()
-    conn.close()
+    # 4) Update DB with final data; the row now shows up in 'processed'
+    with transaction() as conn:
+        written = transition(
+            conn, "written", job_id=job_id, worker=worker_id(),
+            resume_blob=blob_store.put(conn, plain_resume),
+            resume_pdf=resume_pdf_path,
+            cover_letter_blob=blob_store.put(conn, plain_cover),
+            cover_letter_pdf=cover_letter_pdf_path,
+            feedback_blob=blob_store.put(conn, feedback),
+            # Drop the streaming drafts kept inline while writing
+            resume=None,
+            cover_letter=None,
+            # Error left by an earlier failed attempt
+            error=None,
+            emailed=0
+        )
+    if not written:
+        raise RuntimeError(f"Lease on job id={job_id} expired while writing, another worker took it over")
 
     # 6) Mark as done in the Gist
-    update_gist_with_done(job_url)
+    await asyncio.to_thread(update_gist_with_done, job_url)
 
-    return True
+async def determine_degree_approach(job_json, user_data):
+    """Ask GPT if we want degree-Advantage or degree-Light, get the job title, and the company name."""
+    raw = await chat(**degree_judge_request(job_json, user_data))
+    return parse_degree_judgment(raw)
 
-def determine_degree_approach(job_data, user_data):
+def degree_judge_request(job_json, user_data):
+    """Chat request (model, messages, temperature, max_tokens) for the degree judge. job_json comes from build_job_payload."""
     education = user_data.get("education", [])
-    education_text = json.dumps(education, indent=2)
-    """Ask GPT if we want degree-Advantage or degree-Light, get the job title, and the company name."""
-    prompt_text = f"""
-You are an AI career counselor. The user may have an advanced degree such as a JD, MBA, PhD, or other.
+    education_text = compact_json(clean_data(education))
+    # Constant prefix first (instructions + education) so OpenAI can serve it from its prompt cache
+    system_prompt = f"""You are a helpful AI career counselor. The user may have an advanced degree such as a JD, MBA, PhD, or other.
 
 Your job is to decide whether the user's degree(s) should be emphasized (Degree-Advantage) or minimized (Degree-Light) in the resume and cover letter, to overcome ATS filters and get the user an interview.
 
 You are given:
-- Job data (scraped from the application page)
+- Job data (scraped from the application page, in the user message)
 - User's education history
 
-Job Data:
-{json.dumps(job_data, indent=2)}
-
-User Education:
-{education_text}
-
 On the first line, output exactly one of these strings: Degree-Advantage or Degree-Light  
 On the second line, give a short reason for your choice.  
 On the third line, output the job title.  
 On the fourth line, output the company name.
+
+User Education:
+{education_text}
+"""
+    prompt_text = f"""
+Job Data:
+{job_json}
 """
-    r = openai.chat.completions.create(
-        model=JUDGE_MODEL,
-        messages=[
-            {"role": "system", "content": "You are a helpful AI career counselor."},
+    return {
+        "model": JUDGE_MODEL,
+        "messages": [
+            {"role": "system", "content": system_prompt},
             {"role": "user", "content": prompt_text}
         ],
-        temperature=0.0,
-        max_tokens=100
-    )
-    raw = r.choices[0].message.content.strip()
+        "temperature": 0.0,
+        "max_tokens": 100
+    }
+
+def parse_degree_judgment(raw):
+    """Parse the judge's four-line answer into (approach, explanation, job_title, job_company)."""
     lines = raw.split('\n')
     approach = "Degree-Advantage"
     explanation = "No explanation provided."
@@ -245,11 +377,24 @@ On the fourth line, output the company name.
 
     return (approach, explanation, job_title, job_company)
 
-def generate_resume_text(user_data, job_data, approach, degree_reason):
+async def generate_resume_text(user_data, job_json, approach, degree_reason, draft=None):
+    request = resume_request(user_data, job_json, approach, degree_reason)
+    if draft:
+        response_text = await chat_stream(**request, listener=draft)
+    else:
+        response_text = await chat(**request)
+    return split_resume_feedback(response_text)
+
+def resume_request(user_data, job_json, approach, degree_reason):
+    """
+    Chat request for the resume (with feedback in <f></f> tags).
+    The system message is identical for every job (instructions, special instructions, user profile)
+    so OpenAI's prompt cache covers it; only the user message changes per job.
+    """
     special_instructions = user_data.get("special_instructions", [])
     instructions_str = "\n".join(f"- {ins}" for ins in special_instructions)
-    job_json = json.dumps(job_data, indent=2)
-    user_json = json.dumps(user_data, indent=2)
+    # special_instructions are listed on their own above the profile
+    user_json = build_user_payload(user_data, "special_instructions")
 
     advantage_line = ""
     if approach == "degree-Advantage" and degree_reason:
@@ -264,18 +409,8 @@ def generate_resume_text(user_data, job_data, approach, degree_reason):
 - Return the entire resume as multiple lines of markup that ReportLab can parse.
 """
 
-    prompt = f"""
-You are a resume writer AI. The user is building a {approach} resume. Write a professional resume for the user to overcome ATS filters and get the user an interview.
-
-Job Data:
-{job_json}
-
-User Data:
-{user_json}
-
-Special Instructions:
-{instructions_str}
-{advantage_line}
+    system_prompt = f"""You are a helpful resume-writing assistant. You are a resume writer AI. Write a professional resume for the user to overcome ATS filters and get the user an interview.
+The degree approach and the job data are given in the user message.
 
 Avoid false information.
 Only incorporate what's valid from the user data.
@@ -293,18 +428,31 @@ Inclue the dates next to the relevant experience.
 Attept to minimize the resume to one page.
 {extra_reportlab_line}
 At the end return honest and objective feedback (even if negative) about the resume and user data. What could be done by the user to improve their odds of getting the job? What requirements did the user meet and not meet? What kind of data would have helped create a better resume? Is the user a good fit for the job? What are the chances the user gets interviewed for the position? Answer all questions and wrap all feedback in <f></f> tags.
+
+Special Instructions:
+{instructions_str}
+
+User Data:
+{user_json}
+"""
+    prompt = f"""
+The user is building a {approach} resume.{advantage_line}
+
+Job Data:
+{job_json}
 """
-    resp = openai.chat.completions.create(
-        model=WRITER_MODEL,
-        messages=[
-            {"role": "system", "content": "You are a helpful resume-writing assistant."},
+    return {
+        "model": WRITER_MODEL,
+        "messages": [
+            {"role": "system", "content": system_prompt},
             {"role": "user", "content": prompt}
         ],
-        temperature=0.8,
-        max_tokens=3000
-    )
-    response_text = resp.choices[0].message.content.strip()
+        "temperature": 0.8,
+        "max_tokens": 3000
+    }
 
+def split_resume_feedback(response_text):
+    """Separate the resume markup from the feedback wrapped in <f></f> tags."""
     # Extract feedback wrapped in <f></f> tags
     feedback_match = re.search(r"<f>(.*?)</f>", response_text, re.DOTALL)
     feedback = feedback_match.group(1).strip() if feedback_match else ""
@@ -314,12 +462,19 @@ At the end return honest and objective feedback (even if negative) about the res
 
     return resume_text, feedback
 
-def generate_cover_letter_text(user_data, job_data, approach, degree_reason):
+async def generate_cover_letter_text(user_data, job_json, approach, degree_reason, draft=None):
+    request = cover_letter_request(user_data, job_json, approach, degree_reason)
+    if draft:
+        return await chat_stream(**request, listener=draft)
+    return await chat(**request)
+
+def cover_letter_request(user_data, job_json, approach, degree_reason):
+    """Chat request for the cover letter, with the same cacheable system prefix layout as resume_request."""
     today_str = datetime.today().strftime("%B %d, %Y")
     si = user_data.get("special_instructions", [])
     instructions_str = "\n".join(f"- {ins}" for ins in si)
-    job_json = json.dumps(job_data, indent=2)
-    user_json = json.dumps(user_data, indent=2)
+    # special_instructions are listed on their own above the profile
+    user_json = build_user_payload(user_data, "special_instructions")
 
     advantage_line = ""
     if approach == "degree-Advantage" and degree_reason:
@@ -333,19 +488,9 @@ def generate_cover_letter_text(user_data, job_data, approach, degree_reason):
 No XML or <coverletter> tags - just text lines that ReportLab can parse.
 """
 
-    prompt = f"""
-You are a cover letter writer AI. The user has a base set of experiences and wants a professional {approach} cover letter.
-
-Job Data:
-{job_json}
-
-User Data:
-{user_json}
-
-Special Instructions:
-{instructions_str}{advantage_line}
+    system_prompt = f"""You are a helpful cover letter-writing assistant. You are a cover letter writer AI. The user has a base set of experiences and wants a professional cover letter.
+The degree approach, today's date and the job data are given in the user message.
 
-Today's date: {today_str}.
 - include date as first line formatted as Month DD, YYYY
 - Under 1 page at 10 point font
 - highlight the user's fit
@@ -360,17 +505,45 @@ Today's date: {today_str}.
 - avoid false information
 - never include placeholders like [Employer Name] or Address placeholders, if you do not have the information, omit it
 - only use paragraphs, do not include bullet points
+
+Special Instructions:
+{instructions_str}
+
+User Data:
+{user_json}
+"""
+    prompt = f"""
+The user wants a {approach} cover letter.{advantage_line}
+
+Today's date: {today_str}.
+
+Job Data:
+{job_json}
 """
-    r = openai.chat.completions.create(
-        model=WRITER_MODEL,
-        messages=[
-            {"role": "system", "content": "You are a helpful cover letter-writing assistant."},
+    return {
+        "model": WRITER_MODEL,
+        "messages": [
+            {"role": "system", "content": system_prompt},
             {"role": "user", "content": prompt}
         ],
-        temperature=0.9,
-        max_tokens=2000
+        "temperature": 0.9,
+        "max_tokens": 2000
+    }
+
+async def build_resume_pdf(resume_blocks, pdf_path, job_title):
+    """Build the resume PDF with spoofed metadata."""
+    return await render_pdf(
+        resume_blocks, pdf_path, doc_title=f"{FULL_NAME}", author=FULL_NAME,
+        leftMargin=0.5*inch, rightMargin=0.5*inch, topMargin=0.5*inch, bottomMargin=0.5*inch,
+        job_title=job_title, creation_time_range=(2*24*60, 14*24*60)
+    )
+
+async def build_cover_letter_pdf(cover_letter_blocks, pdf_path, job_title):
+    """Build the cover letter PDF with spoofed metadata."""
+    return await render_pdf(
+        cover_letter_blocks, pdf_path, doc_title=f"{FULL_NAME} - Cover Letter for {job_title}", author=FULL_NAME,
+        job_title=job_title, creation_time_range=(2, 60)
     )
-    return r.choices[0].message.content.strip()
 
 def strip_reportlab_tags(markup_text):
     """
@@ -393,158 +566,6 @@ def strip_reportlab_tags(markup_text):
         plain.append(no_bullet)
     return "\n".join(plain)
 
-def create_pdf_reportlab(markup_text, pdf_path, doc_title="Document",
-                         leftMargin=inch, rightMargin=inch,
-                         topMargin=inch, bottomMargin=inch, job_title="", creation_time_range=(2*24*60, 14*24*60)):
-    """
-    - We have two doc types: resume vs cover letter. 
-    - If doc_title has "Cover Letter", we do 10pt. Else 9pt for resume.
-    - Headings (<h>...</h>) => bigger font (12).
-    - Strip out triple backticks and parse line by line.
-    - Center the first non-empty line after the doc title, i.e. contact info.
-    """
-    doc = SimpleDocTemplate(
-        pdf_path, pagesize=LETTER, title=doc_title,
-        leftMargin=leftMargin, rightMargin=rightMargin,
-        topMargin=topMargin, bottomMargin=bottomMargin
-    )
-    styles = getSampleStyleSheet()
-    # if it's a cover letter => 11pt, else => 8pt
-    base_font_size = 11 if "Cover Letter" in doc_title else 8
-
-    docTitleStyle = ParagraphStyle(
-        'DocTitleStyle',
-        fontName='Helvetica-Bold',
-        fontSize=12,
-        leading=2,
-        alignment=TA_CENTER
-    )
-    heading_style = ParagraphStyle(
-        'HeadingStyle',
-        parent=styles['Normal'],
-        fontName='Helvetica-Bold',
-        fontSize=10,
-        leading=20,
-        alignment=TA_LEFT
-    )
-    body_style = ParagraphStyle(
-        'BodyStyle',
-        parent=styles['Normal'],
-        fontName='Helvetica',
-        fontSize=base_font_size,
-        leading=base_font_size+2,
-        alignment=TA_LEFT
-    )
-    story = [
-        Paragraph(doc_title, docTitleStyle),
-        Spacer(1, 0.2*inch)
-    ]
-
-    first_line_found = False
-
-    # Remove triple backticks **markdown** [brackets] and rogue formatting inclusions
-    markup_text = re.sub(r"```+", "", markup_text)
-    markup_text = re.sub(r"\*\*(.*?)\*\*", r"\1", markup_text)
-    markup_text = re.sub(r"\[(.*?)\]", r"\1", markup_text)
-    markup_text = re.sub(r"\b(plaintext|xml|markup|markdown)\b", "", markup_text, flags=re.IGNORECASE)
-
-    # split lines
-    lines = markup_text.split("\n")
-    for ln in lines:
-        line = ln.strip()
-        if not line:
-            story.append(Spacer(1, 0.1 * inch))
-            continue
-
-        # If line has <h> => heading
-        if "<h>" in line:
-            # parse out heading
-            # e.g. <h>Some heading</h>
-            heading_content = re.sub(r"<h>(.*?)</h>", r"\1", line)
-            p = Paragraph(heading_content.upper(), heading_style)
-            story.append(p)
-            continue
-
-        # bullet lines
-        if line.startswith("• "):
-            bullet_text = line[2:].strip()
-            p = Paragraph(f"• {bullet_text}", body_style)
-            story.append(p)
-            continue
-
-        # center the first non-empty line after doc title => contact info
-        if not first_line_found:
-            pstyle = ParagraphStyle(
-                'CenterFirstLine',
-                parent=body_style,
-                alignment=TA_CENTER,
-                fontSize=base_font_size,
-                leading=base_font_size+2,
-            )
-            p = Paragraph(line, pstyle)
-            story.append(p)
-            first_line_found = True
-            continue
-
-        # handle <b>... 
-        # or <br/> => we'll split
-        chunks = line.split("<br/>")
-        for c in chunks:
-            c = c.strip()
-            if not c:
-                story.append(Spacer(1, 0.1*inch))
-                continue
-            final_text = c
-            p2 = Paragraph(final_text, body_style)
-            story.append(p2)
-
-    # Build the PDF normally
-    doc.build(story)
-
-    # Post-process the PDF to add metadata
-    post_process_pdf(pdf_path, doc_title, job_title, creation_time_range)
-
-    print(f"{doc_title} PDF created: {pdf_path}")
-
-def post_process_pdf(pdf_path, doc_title, job_title, creation_time_range):
-    """Post-process the PDF to spoof metadata."""
-    # Generate a random past date within the specified time range
-    random_minutes_ago = random.randint(*creation_time_range)
-    random_creation_date = datetime.now() - timedelta(minutes=random_minutes_ago)
-
-    # Format creation date (D:YYYYMMDDHHMMSS)
-    formatted_creation_date = f"(D:{random_creation_date.strftime('%Y%m%d%H%M%S')})"
-
-    # Calculate ModDate as CreationDate plus 2-30 minutes, ensuring it doesn't exceed the present time
-    random_minutes = random.randint(2, 30)
-    mod_date = min(datetime.now(), random_creation_date + timedelta(minutes=random_minutes))
-    formatted_mod_date = f"(D:{mod_date.strftime('%Y%m%d%H%M%S')})"
-
-    # Read the just-built PDF
-    with open(pdf_path, "rb") as original_pdf:
-        reader = PyPDF2.PdfReader(original_pdf)
-        writer = PyPDF2.PdfWriter()
-        writer.append_pages_from_reader(reader)
-
-        # Set or override metadata
-        metadata = {
-            "/Title": doc_title,
-            "/Author": FULL_NAME,
-            "/Subject": f"{FULL_NAME} {job_title}",
-            "/Keywords": f"{job_title}, {FULL_NAME}",
-            "/Creator": "Microsoft Word",
-            "/Producer": "Acrobat PDFMaker 21.0 for Word",
-            "/CreationDate": formatted_creation_date,
-            "/ModDate": formatted_mod_date
-        }
-        writer.add_metadata(metadata)
-
-        # Write out the updated PDF (overwrite the original)
-        with open(pdf_path, "wb") as updated_pdf:
-            writer.write(updated_pdf)
-
-    #print(f"Metadata updated for {doc_title} PDF: {pdf_path}")
-
 def update_gist_with_done(job_url):
     """Mark job as done in the Gist."""
     response = requests.get(GIST_URL, headers=HEADERS)